@@ -94,13 +94,14 @@ class Bitbucket(AtlassianRestAPI):
         url = 'rest/api/1.0/projects/{0}/avatar.png'.format(key)
         return self.post(url, files=files, headers=headers) or {}
 
-    def project_users(self, key, limit=99999, filter_str=None):
+    def project_users(self, key, limit=99999, filter_str=None, stream=False):
         """
         Get users who has permission in project
         :param key:
         :param limit: OPTIONAL: The limit of the number of users to return, this may be restricted by
                             fixed system limits. Default by built-in method: 99999
         :param filter_str:  OPTIONAL: users filter string
+        :param stream: OPTIONAL: yield users while the response is downloading. Default: False
         :return:
         """
         url = 'rest/api/1.0/projects/{key}/permissions/users'.format(key=key)
@@ -109,6 +110,8 @@ class Bitbucket(AtlassianRestAPI):
             params['limit'] = limit
         if filter_str:
             params['filter'] = filter_str
+        if stream:
+            return self.get_stream(url, params=params)
         return (self.get(url, params=params) or {}).get('values')
 
     def repo_users(self, project_key, repo_key, limit=99999, filter_str=None):
@@ -461,7 +464,7 @@ class Bitbucket(AtlassianRestAPI):
         return self.delete(url)
 
     def get_branches(self, project, repository, base=None, filter=None, start=0, limit=99999, details=True,
-                     order_by='MODIFICATION'):
+                     order_by='MODIFICATION', stream=False):
         """
         Retrieve the branches matching the supplied filterText param.
         The authenticated user must have REPO_READ permission for the specified repository to call this resource.
@@ -474,6 +477,7 @@ class Bitbucket(AtlassianRestAPI):
                     fixed system limits. Default by built-in method: 99999
         :param details: whether to retrieve plugin-provided metadata about each branch
         :param order_by: OPTIONAL: ordering of refs either ALPHABETICAL (by name) or MODIFICATION (last updated)
+        :param stream: OPTIONAL: yield branches while the response is downloading. Default: False
         :return:
         """
         url = 'rest/api/1.0/projects/{project}/repos/{repository}/branches'.format(project=project,
@@ -491,6 +495,8 @@ class Bitbucket(AtlassianRestAPI):
             params['orderBy'] = order_by
         params['details'] = details
 
+        if stream:
+            return self.get_stream(url, params=params)
         return (self.get(url, params=params) or {}).get('values')
 
     def get_default_branch(self, project, repository):
@@ -924,7 +930,7 @@ class Bitbucket(AtlassianRestAPI):
             params['to'] = hash_newest
         return (self.get(url, params=params) or {}).get('diffs')
 
-    def get_commits(self, project, repository, hash_oldest, hash_newest, limit=99999):
+    def get_commits(self, project, repository, hash_oldest, hash_newest, limit=99999, stream=False):
         """
         Get commit list from repo
         :param project:
@@ -933,6 +939,7 @@ class Bitbucket(AtlassianRestAPI):
         :param hash_newest:
         :param limit: OPTIONAL: The limit of the number of commits to return, this may be restricted by
                fixed system limits. Default by built-in method: 99999
+        :param stream: OPTIONAL: yield commits while the response is downloading. Default: False
         :return:
         """
         url = 'rest/api/1.0/projects/{project}/repos/{repository}/commits'.format(project=project,
@@ -944,6 +951,8 @@ class Bitbucket(AtlassianRestAPI):
             params['until'] = hash_newest
         if limit:
             params['limit'] = limit
+        if stream:
+            return self.get_stream(url, params=params)
         return (self.get(url, params=params) or {}).get('values')
 
     def get_commit_info(self, project, repository, commit, path=None):
@@ -997,7 +1006,7 @@ class Bitbucket(AtlassianRestAPI):
             params['limit'] = limit
         return (self.get(url, params=params) or {}).get('values')
 
-    def get_file_list(self, project, repository, query=None, limit=100000):
+    def get_file_list(self, project, repository, query=None, limit=100000, stream=False):
         """
         Retrieve a page of files from particular directory of a repository.
         The search is done recursively, so all files from any sub-directory of the specified directory will be returned.
@@ -1007,6 +1016,7 @@ class Bitbucket(AtlassianRestAPI):
         :param query: the commit ID or ref (e.g. a branch or tag) to list the files at.
                       If not specified the default branch will be used instead.
         :param limit: OPTIONAL
+        :param stream: OPTIONAL: yield file paths while the response is downloading. Default: False
         :return:
         """
         url = 'rest/api/1.0/projects/{project}/repos/{repository}/files'.format(project=project,
@@ -1016,6 +1026,8 @@ class Bitbucket(AtlassianRestAPI):
             params['at'] = query
         if limit:
             params['limit'] = limit
+        if stream:
+            return self.get_stream(url, params=params)
         return (self.get(url, params=params) or {}).get('values')
 
     def get_content_of_file(self, project, repository, filename, at=None, markup=None):
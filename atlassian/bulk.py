@@ -0,0 +1,217 @@
+# coding=utf-8
+import io
+import json
+import logging
+import sqlite3
+import threading
+import time
+from itertools import islice
+from multiprocessing.pool import ThreadPool
+
+from six import integer_types, string_types
+
+log = logging.getLogger(__name__)
+
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+class FileJournal(object):
+    """
+    Append-only journal of processed items, one JSON record per line.
+    The last record of an item wins, so failed items are retried on the next run
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._status = {}
+        try:
+            with io.open(path, encoding='utf-8') as stream:
+                for line in stream:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # the last line can be cut if the previous run was killed
+                        log.warning('Skip broken journal line: {}'.format(line))
+                        continue
+                    self._status[record['id']] = record['status']
+        except IOError:
+            log.info('Start new journal {}'.format(path))
+        self._stream = io.open(path, 'a', encoding='utf-8')
+
+    def is_done(self, item_id):
+        return self._status.get(item_id) == STATUS_DONE
+
+    def done(self):
+        return set(item_id for item_id, status in self._status.items() if status == STATUS_DONE)
+
+    def record(self, item_id, status, error=None):
+        line = json.dumps({'id': item_id, 'status': status, 'error': error, 'time': time.time()})
+        with self._lock:
+            self._status[item_id] = status
+            self._stream.write(u'{}\n'.format(line))
+            self._stream.flush()
+
+    def close(self):
+        self._stream.close()
+
+
+class SqliteJournal(object):
+    """
+    Journal of processed items in a SQLite database, for the jobs with millions of items
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS journal '
+                                 '(id TEXT PRIMARY KEY, status TEXT, error TEXT, time REAL)')
+        self._connection.commit()
+
+    def is_done(self, item_id):
+        with self._lock:
+            row = self._connection.execute('SELECT status FROM journal WHERE id = ?', (item_id,)).fetchone()
+        return row is not None and row[0] == STATUS_DONE
+
+    def done(self):
+        with self._lock:
+            rows = self._connection.execute('SELECT id FROM journal WHERE status = ?', (STATUS_DONE,)).fetchall()
+        return set(row[0] for row in rows)
+
+    def record(self, item_id, status, error=None):
+        with self._lock:
+            self._connection.execute('INSERT OR REPLACE INTO journal (id, status, error, time) VALUES (?, ?, ?, ?)',
+                                     (item_id, status, error, time.time()))
+            self._connection.commit()
+
+    def close(self):
+        self._connection.close()
+
+
+def chunks(items, size):
+    """
+    Split iterable into lists of size items
+    >>> list(chunks(range(5), 2))
+    [[0, 1], [2, 3], [4]]
+    """
+    items = iter(items)
+    chunk = list(islice(items, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(items, size))
+
+
+def concurrent_map(function, items, max_workers=1):
+    """
+    Lazy map over items with up to max_workers threads sharing the client session.
+    Items are processed by windows of max_workers, so only that many results are held in memory,
+    and the results keep the order of the items
+    :param function: callable, called with the item
+    :param items: iterable of items
+    :param max_workers: OPTIONAL: number of threads, 1 runs in the current thread. Default: 1
+    :return: generator of results
+    """
+    if max_workers is None or max_workers <= 1:
+        for item in items:
+            yield function(item)
+        return
+    pool = ThreadPool(max_workers)
+    try:
+        for window in chunks(items, max_workers):
+            for result in pool.map(function, window):
+                yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def open_journal(path):
+    """
+    Open the journal, SQLite is used for the .db, .sqlite and .sqlite3 files, JSON lines file otherwise
+    :param path: file name
+    :return: FileJournal or SqliteJournal
+    """
+    if path.endswith(('.db', '.sqlite', '.sqlite3')):
+        return SqliteJournal(path)
+    return FileJournal(path)
+
+
+def item_key(item):
+    """
+    Default idempotency key of the item: the item itself for strings and numbers, stable JSON otherwise
+    >>> item_key('DEMO-1')
+    'DEMO-1'
+    >>> item_key({'key': 'DEMO-1', 'fields': {'labels': ['x']}})
+    '{"fields": {"labels": ["x"]}, "key": "DEMO-1"}'
+    """
+    if isinstance(item, string_types):
+        return item
+    if isinstance(item, integer_types):
+        return str(item)
+    return json.dumps(item, sort_keys=True)
+
+
+def response_error(response):
+    """
+    Error of the REST call result, the client methods log the failed requests instead of raising
+    :param response: result of the client method
+    :return: error message or None
+    """
+    if response is None:
+        return None
+    status_code = getattr(response, 'status_code', None)
+    if status_code is not None:
+        return None if status_code < 400 else 'HTTP {0}: {1}'.format(status_code, response.text)
+    if isinstance(response, dict):
+        if response.get('errorMessages') or response.get('errors'):
+            return json.dumps({'errorMessages': response.get('errorMessages'), 'errors': response.get('errors')})
+        if isinstance(response.get('statusCode'), integer_types) and response['statusCode'] >= 400:
+            return response.get('message') or str(response['statusCode'])
+    return None
+
+
+def run_bulk(items, operation, journal, key=item_key, stop_on_error=False):
+    """
+    Run the operation for every item and record it in the journal.
+    Items recorded as done by a previous run are skipped, so a killed job resumes where it stopped
+    :param items: iterable of items
+    :param operation: callable, called with the item
+    :param journal: journal object or file name, see open_journal()
+    :param key: OPTIONAL: callable returning the idempotency key of the item. Default: item_key()
+    :param stop_on_error: OPTIONAL: stop on the first failed item. Default: False
+    :return: summary dict with counts of done and skipped items and the failed items errors
+    """
+    own_journal = isinstance(journal, string_types)
+    if own_journal:
+        journal = open_journal(journal)
+    summary = {'done': 0, 'skipped': 0, 'failed': {}}
+    try:
+        for item in items:
+            item_id = key(item)
+            if journal.is_done(item_id):
+                summary['skipped'] += 1
+                continue
+            try:
+                error = response_error(operation(item))
+            except Exception as e:
+                error = '{0}: {1}'.format(e.__class__.__name__, e)
+            if error is None:
+                journal.record(item_id, STATUS_DONE)
+                summary['done'] += 1
+                continue
+            log.error('Failed item {0}: {1}'.format(item_id, error))
+            journal.record(item_id, STATUS_FAILED, error)
+            summary['failed'][item_id] = error
+            if stop_on_error:
+                break
+    finally:
+        if own_journal:
+            journal.close()
+    log.info('Bulk operation: {done} done, {skipped} skipped, {failed} failed'.format(
+        done=summary['done'], skipped=summary['skipped'], failed=len(summary['failed'])))
+    return summary
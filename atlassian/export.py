@@ -0,0 +1,261 @@
+# coding=utf-8
+import csv
+import io
+import json
+import logging
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from six import PY2, string_types, text_type
+
+log = logging.getLogger(__name__)
+
+
+def get_value(data, path):
+    """
+    Get a nested value by dotted path. Numeric parts index lists,
+    other parts applied to a list collect the value of every element
+    >>> get_value({'fields': {'status': {'name': 'Done'}}}, 'fields.status.name')
+    'Done'
+    >>> get_value({'fields': {'labels': ['a', 'b']}}, 'fields.labels.0')
+    'a'
+    >>> get_value({'fields': {'components': [{'name': 'api'}, {'name': 'ui'}]}}, 'fields.components.name')
+    ['api', 'ui']
+    """
+    for part in path.split('.'):
+        if data is None:
+            return None
+        if isinstance(data, list):
+            if part.isdigit():
+                index = int(part)
+                data = data[index] if index < len(data) else None
+            else:
+                data = [item.get(part) for item in data if isinstance(item, dict)]
+        elif isinstance(data, dict):
+            data = data.get(part)
+        else:
+            return None
+    return data
+
+
+def flatten(data, prefix=''):
+    """
+    Flatten nested dictionaries into dotted keys, lists are kept as values
+    >>> flatten({'key': 'A-1', 'fields': {'status': {'name': 'Done'}}})
+    OrderedDict([('key', 'A-1'), ('fields.status.name', 'Done')])
+    """
+    row = OrderedDict()
+    for key in data:
+        value = data[key]
+        name = prefix + key
+        if isinstance(value, dict):
+            row.update(flatten(value, prefix=name + '.'))
+        else:
+            row[name] = value
+    return row
+
+
+def normalize_columns(columns):
+    """
+    Columns spec as list of (column name, dotted path) pairs
+    :param columns: list of dotted paths, dict or list of pairs {column name: dotted path}
+    :return: list of tuples
+    """
+    if columns is None:
+        return None
+    if isinstance(columns, dict):
+        return list(columns.items())
+    return [column if isinstance(column, (list, tuple)) else (column, column) for column in columns]
+
+
+def select(row, columns):
+    """
+    Project a row into a flat dictionary
+    :param row: dict
+    :param columns: list of (column name, dotted path) pairs or None for flattening the whole row
+    :return: OrderedDict
+    """
+    if columns is None:
+        return flatten(row)
+    return OrderedDict((name, get_value(row, path)) for name, path in columns)
+
+
+def _scalar(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+def open_csv(path, mode='r'):
+    """
+    Open a CSV file for the csv module, which reads and writes byte strings on Python 2 and text on Python 3
+    :param path: file name
+    :param mode: OPTIONAL: 'r' or 'w'. Default: 'r'
+    :return: stream
+    """
+    if PY2:
+        return io.open(path, mode + 'b')
+    return io.open(path, mode, encoding='utf-8-sig' if mode == 'r' else 'utf-8', newline='')
+
+
+def csv_value(value):
+    """
+    Value for the csv writer, text is encoded on Python 2
+    """
+    if PY2 and isinstance(value, text_type):
+        return value.encode('utf-8')
+    return value
+
+
+@contextmanager
+def _open_target(target, csv_file=False):
+    if hasattr(target, 'write'):
+        yield target
+    elif csv_file:
+        with open_csv(target, 'w') as stream:
+            yield stream
+    else:
+        with io.open(target, 'w', encoding='utf-8') as stream:
+            yield stream
+
+
+def export_ndjson(rows, target, columns=None):
+    """
+    Write rows as newline delimited JSON, one row at a time
+    :param rows: iterable of dictionaries, e.g. a generator over all pages of a search
+    :param target: file name or text stream
+    :param columns: OPTIONAL: columns spec, see normalize_columns(). Default: rows are written as is
+    :return: number of written rows
+    """
+    columns = normalize_columns(columns)
+    count = 0
+    with _open_target(target) as stream:
+        for row in rows:
+            if columns is not None:
+                row = select(row, columns)
+            stream.write(u'{}\n'.format(json.dumps(row)))
+            count += 1
+    log.info('Exported {} rows as NDJSON'.format(count))
+    return count
+
+
+def export_csv(rows, target, columns=None, delimiter=','):
+    """
+    Write rows as CSV, one row at a time.
+    Without columns spec the header is taken from the flattened first row
+    :param rows: iterable of dictionaries
+    :param target: file name or stream, text stream on Python 3 and binary stream on Python 2
+    :param columns: OPTIONAL: columns spec, see normalize_columns()
+    :param delimiter: OPTIONAL: Default: ','
+    :return: number of written rows
+    """
+    columns = normalize_columns(columns)
+    count = 0
+    with _open_target(target, csv_file=True) as stream:
+        writer = None
+        names = None
+        for row in rows:
+            row = select(row, columns)
+            if writer is None:
+                names = list(row.keys())
+                writer = csv.writer(stream, delimiter=str(delimiter))
+                writer.writerow([csv_value(name) for name in names])
+            writer.writerow([csv_value(_scalar(row.get(name))) for name in names])
+            count += 1
+    log.info('Exported {} rows as CSV'.format(count))
+    return count
+
+
+def export_parquet(rows, target, columns=None, batch_size=10000):
+    """
+    Write rows as Parquet file, one row group per batch, so only batch_size rows are kept in memory.
+    The schema is inferred from the first batch, the columns without any value in it are written as strings.
+    A failed export removes the partial file. Requires the pyarrow package
+    :param rows: iterable of dictionaries
+    :param target: file name
+    :param columns: OPTIONAL: columns spec, see normalize_columns()
+    :param batch_size: OPTIONAL: rows per row group. Default: 10000
+    :return: number of written rows
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        log.error('Please, install pyarrow for the Parquet export')
+        raise
+    columns = normalize_columns(columns)
+    count = 0
+    names = None
+    schema = None
+    string_columns = set()
+    writer = None
+    batch = []
+
+    def column(name):
+        values = [_scalar(row.get(name)) for row in batch]
+        if name in string_columns:
+            return [value if value is None or isinstance(value, string_types) else json.dumps(value)
+                    for value in values]
+        return values
+
+    def write_batch(writer, schema):
+        if writer is None:
+            table = pyarrow.Table.from_pydict(OrderedDict((name, column(name)) for name in names))
+            # columns without any value in the first batch can't have the null type in the file,
+            # they are strings and the values of the next batches are converted
+            string_columns.update(field.name for field in table.schema if pyarrow.types.is_null(field.type))
+            schema = pyarrow.schema([pyarrow.field(field.name, pyarrow.string())
+                                     if field.name in string_columns else field
+                                     for field in table.schema])
+            writer = pyarrow.parquet.ParquetWriter(target, schema)
+            table = table.cast(schema)
+        else:
+            table = pyarrow.Table.from_pydict(OrderedDict((name, column(name)) for name in names), schema=schema)
+        writer.write_table(table)
+        return writer, schema
+
+    try:
+        for row in rows:
+            row = select(row, columns)
+            if names is None:
+                names = list(row.keys())
+            batch.append(row)
+            count += 1
+            if len(batch) >= batch_size:
+                writer, schema = write_batch(writer, schema)
+                batch = []
+        if batch:
+            writer, schema = write_batch(writer, schema)
+    except Exception:
+        if writer is not None:
+            writer.close()
+            writer = None
+        if os.path.exists(target):
+            os.remove(target)
+        raise
+    finally:
+        if writer is not None:
+            writer.close()
+    log.info('Exported {} rows as Parquet'.format(count))
+    return count
+
+
+def export(rows, target, export_format=None, columns=None, **kwargs):
+    """
+    Export rows into file, the format is taken from the file extension when it is not set
+    :param rows: iterable of dictionaries
+    :param target: file name or text stream
+    :param export_format: OPTIONAL: ndjson, csv or parquet
+    :param columns: OPTIONAL: columns spec, see normalize_columns()
+    :return: number of written rows
+    """
+    if export_format is None:
+        export_format = str(target).rsplit('.', 1)[-1].lower()
+    if export_format in ('ndjson', 'jsonl', 'json'):
+        return export_ndjson(rows, target, columns=columns)
+    if export_format == 'csv':
+        return export_csv(rows, target, columns=columns, **kwargs)
+    if export_format in ('parquet', 'arrow'):
+        return export_parquet(rows, target, columns=columns, **kwargs)
+    raise ValueError('Unknown export format: {}'.format(export_format))
@@ -1,12 +1,138 @@
 # coding=utf-8
+import codecs
+import csv as csv_module
 import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
 from requests.exceptions import HTTPError
+from six import integer_types, string_types
+from six.moves.urllib.parse import quote
+from .bulk import chunks, concurrent_map, response_error
+from .export import open_csv
+from .jira_groups import GroupSnapshot
+from .jira_metadata import JiraMetadata
+from .jira_screens import ScreenSchema
+from .jira_users import UserDirectory
 from .rest_client import AtlassianRestAPI
 
 log = logging.getLogger(__name__)
 
 
+class _TrackedFields(dict):
+    """
+    Issue fields dictionary which remembers the names of the fields read from it.
+    Used by the fields learning mode of Jira
+    """
+
+    def __init__(self, data, accessed):
+        super(_TrackedFields, self).__init__(data)
+        self._accessed = accessed
+
+    def __getitem__(self, key):
+        self._accessed.add(key)
+        return super(_TrackedFields, self).__getitem__(key)
+
+    def __contains__(self, key):
+        self._accessed.add(key)
+        return super(_TrackedFields, self).__contains__(key)
+
+    def get(self, key, default=None):
+        self._accessed.add(key)
+        return super(_TrackedFields, self).get(key, default)
+
+
 class Jira(AtlassianRestAPI):
+    default_fields_profiles = {
+        'all': '*all',
+        'navigable': '*navigable',
+        'none': '*none',
+        'minimal': ['summary', 'status', 'issuetype'],
+        'triage': ['summary', 'status', 'issuetype', 'priority', 'assignee', 'reporter', 'labels', 'components',
+                   'created', 'updated'],
+    }
+
+    def __init__(self, *args, **kwargs):
+        """
+        :param fields_profile: OPTIONAL: profile name or list of fields used by the search and issue methods
+                               when no fields are given. Default: 'all'
+        :param learn_fields: OPTIONAL: remember which issue fields were read by the caller,
+                             see get_accessed_fields(). Default: False
+        """
+        self.fields_profile = kwargs.pop('fields_profile', 'all')
+        self.learn_fields = kwargs.pop('learn_fields', False)
+        self.fields_profiles = dict(self.default_fields_profiles)
+        self.accessed_fields = set()
+        self._jql_count_cache = {}
+        self._transitions_cache = {}
+        self._metadata = None
+        self._user_directory = None
+        super(Jira, self).__init__(*args, **kwargs)
+
+    @property
+    def metadata(self):
+        """
+        Registry of fields, statuses, priorities, resolutions, issue types and link types, see JiraMetadata
+        """
+        if self._metadata is None:
+            self._metadata = JiraMetadata(self)
+        return self._metadata
+
+    @property
+    def user_directory(self):
+        """
+        Cache of the users by username, key and email, see UserDirectory
+        """
+        if self._user_directory is None:
+            self._user_directory = UserDirectory(self)
+        return self._user_directory
+
+    def set_fields_profile(self, name, fields):
+        """
+        Register a custom fields profile, which can then be used as fields argument or client default
+        :param name: profile name, e.g. 'release-notes'
+        :param fields: list of fields or comma separated string, e.g. ['summary', 'fixVersions']
+        :return:
+        """
+        self.fields_profiles[name] = fields
+
+    def resolve_fields(self, fields=None):
+        """
+        Translate fields argument into the value of the fields request parameter
+        :param fields: None for the client profile, profile name, list of fields or raw string like 'summary,status'
+        :return: str
+        """
+        if fields is None:
+            fields = self.fields_profile
+        if isinstance(fields, string_types) and fields in self.fields_profiles:
+            fields = self.fields_profiles[fields]
+        if isinstance(fields, (list, tuple, set)):
+            fields = ','.join(fields)
+        return fields
+
+    def get_accessed_fields(self):
+        """
+        Provide the issue fields read by the caller while learning mode is enabled.
+        Use it to narrow the fields profile of a job
+        :return: sorted list of field names
+        """
+        accessed_fields = sorted(self.accessed_fields)
+        log.info('Accessed issue fields: {}'.format(','.join(accessed_fields)))
+        return accessed_fields
+
+    def _track_fields(self, response):
+        if not self.learn_fields or not isinstance(response, dict):
+            return response
+        issues = response.get('issues') if 'issues' in response else [response]
+        for issue in issues or []:
+            if isinstance(issue, dict) and isinstance(issue.get('fields'), dict):
+                issue['fields'] = _TrackedFields(issue['fields'], self.accessed_fields)
+        return response
+
     def reindex_status(self):
         return self.get('rest/api/2/reindex')
 
@@ -52,11 +178,12 @@ class Jira(AtlassianRestAPI):
     def reindex_issue(self, list_of_):
         pass
 
-    def jql(self, jql, fields='*all', start=0, limit=None, expand=None):
+    def jql(self, jql, fields=None, start=0, limit=None, expand=None):
         """
         Get issues from jql search result with all related fields
         :param jql:
-        :param fields: list of fields, for example: ['priority', 'summary', 'customfield_10007']
+        :param fields: list of fields, for example: ['priority', 'summary', 'customfield_10007'],
+                       or fields profile name, for example: 'minimal'. Default: the client fields profile
         :param start: OPTIONAL: The start point of the collection to return. Default: 0.
         :param limit: OPTIONAL: The limit of the number of issues to return, this may be restricted by
                 fixed system limits. Default by built-in method: 50
@@ -68,27 +195,238 @@ class Jira(AtlassianRestAPI):
             params['startAt'] = int(start)
         if limit is not None:
             params['maxResults'] = int(limit)
+        fields = self.resolve_fields(fields)
         if fields is not None:
-            if isinstance(fields, (list, tuple, set)):
-                fields = ','.join(fields)
             params['fields'] = fields
         if jql is not None:
             params['jql'] = jql
         if expand is not None:
             params['expand'] = expand
-        return self.get('rest/api/2/search', params=params)
+        return self._track_fields(self.get('rest/api/2/search', params=params))
+
+    @staticmethod
+    def _search_result(response, start):
+        """
+        Issues and total of a search page. A failed page raises, so it is not taken for the end of the results
+        :param response: search response
+        :param start: index of the first issue of the page
+        :return: tuple of list of issues and total
+        """
+        response = Jira._checked_page(response, 'issues', 'Search page at {}'.format(start))
+        return response['issues'], response.get('total') or 0
+
+    @staticmethod
+    def _checked_page(response, key, context):
+        """
+        Raise HTTPError for a failed page of a paged resource, instead of taking it for the last page
+        :param response: page response
+        :param key: name of the list of the page
+        :param context: description of the page for the error message
+        :return: response
+        """
+        if isinstance(response, dict):
+            error = response_error(response)
+            if error is None and not isinstance(response.get(key), list):
+                error = 'No {0} in the response: {1}'.format(key, response)
+        else:
+            error = 'Unexpected response: {}'.format(response)
+        if error is not None:
+            log.error('{0} failed: {1}'.format(context, error))
+            raise HTTPError('{0} failed: {1}'.format(context, error))
+        return response
 
-    def csv(self, jql, limit=1000):
+    def jql_iter(self, jql, fields=None, page_size=100, expand=None, order_by='key', max_workers=1, strict=False):
+        """
+        Generator over all issues of the jql search result, page by page
+        Issues are ordered by a stable key, so the pages don't shift while the search is iterated,
+        and an issue shifted back across a page boundary is not returned twice: only the ids of the last
+        two pages are kept for this, so the memory is bounded by the page size.
+        A failed page raises HTTPError instead of ending the results early
+        :param jql:
+        :param fields: list of fields or fields profile name. Default: the client fields profile
+        :param page_size: OPTIONAL: issues per request, this may be restricted by fixed system limits. Default: 100
+        :param expand: OPTIONAL: expand the search result
+        :param order_by: OPTIONAL: ordering appended to the jql without ORDER BY clause. Default: 'key'
+        :param max_workers: OPTIONAL: fetch the pages after the first one concurrently. Default: 1
+        :param strict: OPTIONAL: raise HTTPError when fewer issues than the total of the first page are returned,
+                e.g. when issues are deleted or moved during the iteration, otherwise it is logged. Default: False
+        :return: generator of issues
+        """
+        if order_by and 'order by' not in jql.lower():
+            jql = '{jql} ORDER BY {order_by}'.format(jql=jql, order_by=order_by)
+        # ids of the last pages, an already returned issue can only come back at a page boundary
+        recent = deque(maxlen=2)
+        count = 0
+
+        def page(start):
+            response = self.jql(jql, fields=fields, start=start, limit=page_size, expand=expand)
+            return self._search_result(response, start)[0]
+
+        issues, total = self._search_result(self.jql(jql, fields=fields, start=0, limit=page_size,
+                                                     expand=expand), 0)
+        # the server can cap the page size
+        step = len(issues) if len(issues) < page_size else page_size
+        if max_workers > 1 and step:
+            pages = concurrent_map(page, range(step, total, step), max_workers=max_workers)
+        else:
+            pages = None
+        start = 0
+        while True:
+            ids = set()
+            for issue in issues:
+                if issue.get('id') not in ids and not any(issue.get('id') in page_ids for page_ids in recent):
+                    ids.add(issue.get('id'))
+                    count += 1
+                    yield issue
+            recent.append(ids)
+            start += step
+            # an empty page before the total is not the end, the result shrank while it was read
+            if not step or start >= total:
+                break
+            issues = next(pages) if pages is not None else page(start)
+        if count < total:
+            message = 'Search returned {0} of {1} issues: {2}'.format(count, total, jql)
+            if strict:
+                raise HTTPError(message)
+            log.error(message)
+
+    def jql_count(self, jql):
+        """
+        Get the number of issues matching the jql, without any issue in the response
+        :param jql:
+        :return: int
+        """
+        return (self.jql(jql, fields='*none', start=0, limit=0) or {}).get('total')
+
+    def jql_counts(self, jql_list, max_workers=8, cache_ttl=60):
+        """
+        Get the numbers of issues matching many jql queries, e.g. for the dashboard counters
+        The queries are counted concurrently, the counts are cached by the client for cache_ttl seconds
+        :param jql_list: list of jql queries
+        :param max_workers: OPTIONAL: number of concurrent requests. Default: 8
+        :param cache_ttl: OPTIONAL: seconds to reuse the previous count of the same query, 0 disables the cache.
+                Default: 60
+        :return: dict jql -> number of issues
+        """
+        now = time.time()
+        counts = OrderedDict()
+        for jql in jql_list:
+            cached = self._jql_count_cache.get(jql)
+            counts[jql] = cached[1] if cached and cache_ttl and now - cached[0] < cache_ttl else None
+        missing = [jql for jql, count in counts.items() if count is None]
+        for jql, count in zip(missing, concurrent_map(self.jql_count, missing, max_workers=max_workers)):
+            counts[jql] = count
+            if count is not None:
+                self._jql_count_cache[jql] = (now, count)
+        return counts
+
+    def csv(self, jql, limit=1000, start=None, all_fields=True):
         """
         Get issues from jql search result with all related fields
         :param jql: JQL query
         :param limit: max results in the output file
+        :param start: OPTIONAL: index of the first issue
+        :param all_fields: OPTIONAL: all fields or the current fields of the issue navigator. Default: True
         :return: CSV file
         """
+        return self._csv_response(jql, limit=limit, start=start, all_fields=all_fields).content
+
+    def _csv_response(self, jql, limit=1000, start=None, all_fields=True):
         params = {'tempMax': limit,
                   'jqlQuery': jql}
-        url = 'sr/jira.issueviews:searchrequest-csv-all-fields/temp/SearchRequest.csv'
-        return self.get(url, params=params, not_json_response=True, headers={'Accept': 'application/csv'})
+        if start:
+            params['pager/start'] = start
+        if all_fields:
+            url = 'sr/jira.issueviews:searchrequest-csv-all-fields/temp/SearchRequest.csv'
+        else:
+            url = 'sr/jira.issueviews:searchrequest-csv-current-fields/temp/SearchRequest.csv'
+        return self.request('GET', url, params=params, headers={'Accept': 'application/csv'})
+
+    def csv_export(self, jql, path, chunk_size=1000, all_fields=True, max_workers=1):
+        """
+        Export any number of issues into one CSV file, beyond the tempMax limit of csv().
+        The chunks are downloaded into temporary files, then merged with a single header row.
+        Multi-value fields are exported as repeated columns, as many as the chunk needs,
+        so the merged header gets the most repetitions of every column.
+        A failed chunk, or fewer exported issues than the search total, raises HTTPError
+        and no output file is left
+        :param jql: JQL query, ordered by key when it has no ORDER BY clause
+        :param path: output file name
+        :param chunk_size: OPTIONAL: issues per request, the server allows 1000 at most. Default: 1000
+        :param all_fields: OPTIONAL: all fields or the current fields of the issue navigator. Default: True
+        :param max_workers: OPTIONAL: number of chunks downloaded concurrently. Default: 1
+        :return: number of exported issues
+        """
+        if 'order by' not in jql.lower():
+            jql = '{jql} ORDER BY key'.format(jql=jql)
+        total = self.jql_count(jql)
+        if total is None:
+            raise HTTPError('Count of the CSV export failed: {}'.format(jql))
+        starts = range(0, total, chunk_size)
+        temp_dir = tempfile.mkdtemp(prefix='jira-csv-')
+        written = False
+        try:
+            def download(start):
+                response = self._csv_response(jql, limit=chunk_size, start=start, all_fields=all_fields)
+                error = response_error(response)
+                if error is not None:
+                    log.error('CSV chunk at {0} failed: {1}'.format(start, error))
+                    raise HTTPError('CSV chunk at {0} failed: {1}'.format(start, error))
+                chunk_path = os.path.join(temp_dir, '{:010d}.csv'.format(start))
+                with open(chunk_path, 'wb') as stream:
+                    stream.write(response.content or b'')
+                return chunk_path
+
+            def read_header(reader):
+                header = next(reader, [])
+                # Python 2 reads bytes, including the byte order mark of the file
+                if header and isinstance(header[0], bytes) and header[0].startswith(codecs.BOM_UTF8):
+                    header[0] = header[0][len(codecs.BOM_UTF8):]
+                return header
+
+            chunk_paths = list(concurrent_map(download, starts, max_workers=max_workers))
+            # column name -> max repetitions, in the order of appearance
+            columns = OrderedDict()
+            for chunk_path in chunk_paths:
+                with open_csv(chunk_path) as stream:
+                    header = read_header(csv_module.reader(stream))
+                for name in header:
+                    columns[name] = max(columns.get(name, 0), header.count(name))
+            merged_header = [name for name, repetitions in columns.items() for __ in range(repetitions)]
+            positions = {}
+            for name, repetitions in columns.items():
+                for index in range(repetitions):
+                    positions[(name, index)] = len(positions)
+            count = 0
+            written = True
+            with open_csv(path, 'w') as output:
+                writer = csv_module.writer(output)
+                writer.writerow(merged_header)
+                for chunk_path in chunk_paths:
+                    with open_csv(chunk_path) as stream:
+                        reader = csv_module.reader(stream)
+                        header = read_header(reader)
+                        occurrences = {}
+                        mapping = []
+                        for name in header:
+                            mapping.append(positions[(name, occurrences.get(name, 0))])
+                            occurrences[name] = occurrences.get(name, 0) + 1
+                        for row in reader:
+                            merged = [''] * len(merged_header)
+                            for position, value in zip(mapping, row):
+                                merged[position] = value
+                            writer.writerow(merged)
+                            count += 1
+            if count < total:
+                raise HTTPError('CSV export returned {0} of {1} issues: {2}'.format(count, total, jql))
+        except Exception:
+            if written and os.path.exists(path):
+                os.remove(path)
+            raise
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        log.info('Exported {0} issues into {1}'.format(count, path))
+        return count
 
     def user(self, username, expand=None):
         """
@@ -305,16 +643,19 @@ class Jira(AtlassianRestAPI):
                   }
         return self.get(url, params=params)
 
-    def projects(self, included_archived=None):
+    def projects(self, included_archived=None, expand=None):
         """Returns all projects which are visible for the currently logged in user.
         If no user is logged in, it returns the list of projects that are visible when using anonymous access.
         :param included_archived: boolean whether to include archived projects in response, default: false
+        :param expand: OPTIONAL: the parameters to expand, e.g. 'lead,description'
         :return:
         """
         params = {}
         if included_archived:
             params['includeArchived'] = included_archived
-        return self.get('rest/api/2/project')
+        if expand:
+            params['expand'] = expand
+        return self.get('rest/api/2/project', params=params)
 
     def get_all_projects(self, included_archived=None):
         return self.projects(included_archived)
@@ -477,6 +818,14 @@ class Jira(AtlassianRestAPI):
 
         return self.get(url)
 
+    def get_all_issue_types(self):
+        """
+        Returns a list of all issue types visible to the user
+        :return:
+        """
+        url = 'rest/api/2/issuetype'
+        return self.get(url)
+
     def create_issue_type(self, name, description='', type='standard'):
         """
         Create a new issue type
@@ -492,27 +841,103 @@ class Jira(AtlassianRestAPI):
         }
         return self.post('rest/api/2/issuetype', data=data)
 
-    def issue(self, key, fields='*all'):
-        return self.get('rest/api/2/issue/{0}?fields={1}'.format(key, fields))
+    def issue(self, key, fields=None):
+        """
+        Get issue by key
+        :param key:
+        :param fields: list of fields or fields profile name. Default: the client fields profile
+        :return:
+        """
+        params = {'fields': self.resolve_fields(fields)}
+        return self._track_fields(self.get('rest/api/2/issue/{0}'.format(key), params=params))
 
-    def bulk_issue(self, issue_list, fields='*all'):
+    def bulk_issue(self, issue_list, fields=None):
         """
-        :param fields:
+        Get issues by keys, see bulk_issue_map()
+        :param fields: list of fields or fields profile name. Default: the client fields profile
         :param list issue_list:
-        :return:
+        :return: tuple of search result with all found issues and list of missing issue keys
         """
-        missing_issues = list()
-        jql = 'key in ({})'.format(', '.join(['"{}"'.format(key) for key in issue_list]))
-        query_result = self.jql(jql, fields=fields)
-        if 'errorMessages' in query_result.keys():
-            for message in query_result['errorMessages']:
-                for key in issue_list:
-                    if key in message:
-                        missing_issues.append(key)
-                        issue_list.remove(key)
-            query_result, missing_issues = self.bulk_issue(issue_list, fields)
+        issues, missing_issues = self.bulk_issue_map(issue_list, fields=fields)
+        query_result = {'startAt': 0,
+                        'maxResults': len(issues),
+                        'total': len(issues),
+                        'issues': list(issues.values())}
         return query_result, missing_issues
 
+    def bulk_issue_map(self, issue_keys, fields=None, chunk_size=200, max_workers=1):
+        """
+        Get issues by keys in one pass.
+        Keys are searched by chunks sent in the body of POST /search requests, so any number of keys fits,
+        and the missing keys are reported as warnings instead of failing the search
+        :param issue_keys: list of issue keys
+        :param fields: list of fields or fields profile name. Default: the client fields profile
+        :param chunk_size: OPTIONAL: keys per search. Default: 200
+        :param max_workers: OPTIONAL: number of chunks searched concurrently. Default: 1
+        :return: tuple of ordered dict key -> issue and list of missing issue keys
+        """
+        issue_keys = list(OrderedDict.fromkeys(issue_keys))
+        fields = self.resolve_fields(fields)
+
+        def search(chunk):
+            jql = 'key in ({}) ORDER BY key'.format(', '.join(['"{}"'.format(key) for key in chunk]))
+            return list(self.jql_post_iter(jql, fields=fields, page_size=len(chunk)))
+
+        found = {}
+        for issues in concurrent_map(search, chunks(issue_keys, chunk_size), max_workers=max_workers):
+            for issue in issues:
+                found[issue['key']] = issue
+        issues = OrderedDict((key, found[key]) for key in issue_keys if key in found)
+        missing_issues = [key for key in issue_keys if key not in found]
+        return issues, missing_issues
+
+    def jql_post(self, jql, fields=None, start=0, limit=None, expand=None, validate_query='warn'):
+        """
+        Search issues with the query in the body of a POST request, for the queries too long for the url
+        :param jql:
+        :param fields: list of fields or fields profile name. Default: the client fields profile
+        :param start: OPTIONAL: The start point of the collection to return. Default: 0.
+        :param limit: OPTIONAL: The limit of the number of issues to return, this may be restricted by
+                fixed system limits. Default by built-in method: 50
+        :param expand: OPTIONAL: list of the parameters to expand
+        :param validate_query: OPTIONAL: strict, warn or none. With warn, the unknown issue keys
+                are reported in warningMessages instead of failing the search. Default: 'warn'
+        :return:
+        """
+        data = {'jql': jql, 'startAt': int(start or 0)}
+        if limit is not None:
+            data['maxResults'] = int(limit)
+        fields = self.resolve_fields(fields)
+        if fields is not None:
+            data['fields'] = fields.split(',')
+        if expand is not None:
+            data['expand'] = expand.split(',') if isinstance(expand, string_types) else list(expand)
+        if validate_query is not None:
+            data['validateQuery'] = validate_query
+        return self._track_fields(self.post('rest/api/2/search', data=data, read_only=True))
+
+    def jql_post_iter(self, jql, fields=None, page_size=100, expand=None, validate_query='warn'):
+        """
+        Generator over all issues of the POST /search result, page by page.
+        A failed page raises HTTPError instead of ending the results early
+        :param jql:
+        :param fields: list of fields or fields profile name. Default: the client fields profile
+        :param page_size: OPTIONAL: issues per request. Default: 100
+        :param expand: OPTIONAL: list of the parameters to expand
+        :param validate_query: OPTIONAL: strict, warn or none. Default: 'warn'
+        :return: generator of issues
+        """
+        start = 0
+        while True:
+            response = self.jql_post(jql, fields=fields, start=start, limit=page_size, expand=expand,
+                                     validate_query=validate_query)
+            issues, total = self._search_result(response, start)
+            for issue in issues:
+                yield issue
+            start += len(issues)
+            if not issues or start >= total:
+                break
+
     def get_issue_changelog(self, issue_key):
         """
         Get issue related change log
@@ -522,6 +947,93 @@ class Jira(AtlassianRestAPI):
         url = 'rest/api/2/issue/{}?expand=changelog'.format(issue_key)
         return (self.get(url) or {}).get('changelog')
 
+    def get_issue_changelog_histories(self, issue_key, page_size=100):
+        """
+        Get all histories of the issue changelog, page by page where the changelog resource is available,
+        otherwise (404) the whole changelog is expanded in the issue. Any other failure raises HTTPError
+        :param issue_key:
+        :param page_size: OPTIONAL: histories per request. Default: 100
+        :return: list of histories
+        """
+        url = 'rest/api/2/issue/{}/changelog'.format(issue_key)
+        histories = []
+        start = 0
+        while True:
+            response = self.request('GET', url, params={'startAt': start, 'maxResults': page_size})
+            if start == 0 and response.status_code == 404:
+                response = self.get('rest/api/2/issue/{}'.format(issue_key), params={'expand': 'changelog'})
+                if isinstance(response, dict) and response_error(response) is None:
+                    response = response.get('changelog')
+                return self._checked_page(response, 'histories', 'Changelog of {}'.format(issue_key))['histories']
+            error = response_error(response)
+            if error is not None:
+                log.error('Changelog of {0} at {1} failed: {2}'.format(issue_key, start, error))
+                raise HTTPError('Changelog of {0} at {1} failed: {2}'.format(issue_key, start, error))
+            response = self._checked_page(response.json(), 'values',
+                                          'Changelog of {0} at {1}'.format(issue_key, start))
+            histories.extend(response['values'])
+            start += len(response['values'])
+            if response.get('isLast', True) or not response['values']:
+                break
+        return histories
+
+    @staticmethod
+    def changelog_events(issue_key, histories):
+        """
+        Flatten the changelog histories into field change events
+        :param issue_key:
+        :param histories: list of changelog histories
+        :return: generator of dicts with issue, field, from, to, author and timestamp keys
+        """
+        for history in histories:
+            author = history.get('author') or {}
+            for item in history.get('items') or []:
+                yield {
+                    'issue': issue_key,
+                    'field': item.get('field'),
+                    'from': item.get('fromString') if item.get('fromString') is not None else item.get('from'),
+                    'to': item.get('toString') if item.get('toString') is not None else item.get('to'),
+                    'author': author.get('name') or author.get('accountId'),
+                    'timestamp': history.get('created')}
+
+    def bulk_changelog(self, jql=None, issue_keys=None, page_size=50, max_workers=1):
+        """
+        Harvest the changelogs of many issues as a stream of field change events
+        The changelogs are expanded in the paged searches, the changelogs truncated by the server
+        are completed by per issue requests, concurrently. A failed request raises HTTPError
+        :param jql: OPTIONAL: issues of the jql search
+        :param issue_keys: OPTIONAL: list of issue keys, when jql is not set
+        :param page_size: OPTIONAL: issues per search request. Default: 50
+        :param max_workers: OPTIONAL: number of concurrent requests. Default: 1
+        :return: generator of dicts with issue, field, from, to, author and timestamp keys
+        """
+        if jql is not None:
+            issues = self.jql_iter(jql, fields='*none', page_size=page_size, expand='changelog',
+                                   max_workers=max_workers)
+        else:
+            def search(chunk):
+                jql_chunk = 'key in ({}) ORDER BY key'.format(', '.join(['"{}"'.format(key) for key in chunk]))
+                return list(self.jql_post_iter(jql_chunk, fields='*none', page_size=page_size,
+                                               expand=['changelog']))
+
+            issues = (issue
+                      for page in concurrent_map(search, chunks(issue_keys or [], page_size), max_workers=max_workers)
+                      for issue in page)
+        for page in chunks(issues, page_size):
+            truncated = []
+            for issue in page:
+                changelog = issue.get('changelog')
+                histories = (changelog or {}).get('histories') or []
+                if changelog is None or (changelog.get('total') or 0) > len(histories):
+                    truncated.append(issue['key'])
+                    continue
+                for event in self.changelog_events(issue['key'], histories):
+                    yield event
+            for key, histories in zip(truncated, concurrent_map(self.get_issue_changelog_histories, truncated,
+                                                                max_workers=max_workers)):
+                for event in self.changelog_events(key, histories):
+                    yield event
+
     def issue_add_json_worklog(self, key, worklog):
         """
 
@@ -548,6 +1060,123 @@ class Jira(AtlassianRestAPI):
             data['comment'] = comment
         return self.issue_add_json_worklog(key=key, worklog=data)
 
+    def get_issue_worklogs(self, key, page_size=1000):
+        """
+        Get all worklogs of the issue, page by page. A failed page raises HTTPError
+        :param key: issue key
+        :param page_size: OPTIONAL: worklogs per request. Default: 1000
+        :return: list of worklogs
+        """
+        url = 'rest/api/2/issue/{}/worklog'.format(key)
+        worklogs = []
+        while True:
+            response = self._checked_page(self.get(url, params={'startAt': len(worklogs), 'maxResults': page_size}),
+                                          'worklogs', 'Worklogs of {}'.format(key))
+            page = response['worklogs']
+            worklogs.extend(page)
+            if not page or len(worklogs) >= (response.get('total') or 0):
+                return worklogs
+
+    @staticmethod
+    def worklog_started(value):
+        """
+        Normalize the start time of a worklog to UTC, for comparing worklogs written with different offsets
+        >>> Jira.worklog_started('2020-01-01T10:00:00.000+0100')
+        '2020-01-01T09:00:00'
+
+        :param value: yyyy-MM-ddTHH:mm:ss.SSS+ZZZZ
+        :return: UTC time or None when the value is not valid
+        """
+        try:
+            moment = datetime.strptime(value[:19], '%Y-%m-%dT%H:%M:%S')
+            fraction, offset = value[19:-5], value[-5:]
+            if fraction and not (fraction[0] == '.' and fraction[1:].isdigit()):
+                return None
+            if offset[0] not in '+-' or not offset[1:].isdigit():
+                return None
+            delta = timedelta(hours=int(offset[1:3]), minutes=int(offset[3:]))
+        except (TypeError, ValueError):
+            return None
+        moment = moment - delta if offset[0] == '+' else moment + delta
+        return moment.isoformat()
+
+    @staticmethod
+    def worklog_identity(worklog):
+        """
+        Key of the worklog used for the duplicates detection: start time, time spent and comment
+        """
+        return (Jira.worklog_started(worklog.get('started')), worklog.get('timeSpentSeconds'),
+                (worklog.get('comment') or '').strip())
+
+    def bulk_add_worklogs(self, entries, deduplicate=True, max_workers=4):
+        """
+        Add many worklogs.
+        The entries are validated before any request, the existing worklogs are fetched once per issue
+        to skip the entries already logged, and the issues are processed concurrently
+        :param entries: iterable of dicts with issue key, started (yyyy-MM-ddTHH:mm:ss.SSS+ZZZZ),
+                timeSpentSeconds and optional comment, e.g.
+                {'issue': 'DEMO-1', 'started': '2020-01-01T09:00:00.000+0000', 'timeSpentSeconds': 3600}
+        :param deduplicate: OPTIONAL: skip the entries matching an existing worklog
+                with the same start time, time spent and comment. Default: True
+        :param max_workers: OPTIONAL: number of issues processed concurrently. Default: 4
+        :return: dict with lists of created, duplicates, invalid and failed entries, with their index
+        """
+        report = {'created': [], 'duplicates': [], 'invalid': [], 'failed': []}
+        by_issue = OrderedDict()
+        for index, entry in enumerate(entries):
+            error = None
+            if not isinstance(entry, dict) or not isinstance(entry.get('issue'), string_types) or not entry['issue']:
+                error = 'Missing issue key'
+            elif self.worklog_started(entry.get('started')) is None:
+                error = 'Invalid started time, expected yyyy-MM-ddTHH:mm:ss.SSS+ZZZZ'
+            elif (not isinstance(entry.get('timeSpentSeconds'), integer_types) or isinstance(entry['timeSpentSeconds'], bool) or
+                  entry['timeSpentSeconds'] <= 0):
+                error = 'timeSpentSeconds must be a positive integer'
+            if error is not None:
+                report['invalid'].append({'index': index, 'error': error, 'data': entry})
+                continue
+            by_issue.setdefault(entry['issue'], []).append((index, entry))
+
+        def write(item):
+            issue_key, issue_entries = item
+            results = []
+            existing = {}
+            try:
+                if deduplicate:
+                    for worklog in self.get_issue_worklogs(issue_key):
+                        existing[self.worklog_identity(worklog)] = worklog.get('id')
+            except Exception as e:
+                error = '{0}: {1}'.format(e.__class__.__name__, e)
+                return [('failed', {'index': index, 'issue': issue_key, 'error': error})
+                        for index, __ in issue_entries]
+            for index, entry in issue_entries:
+                identity = self.worklog_identity(entry)
+                if identity in existing:
+                    results.append(('duplicates', {'index': index, 'issue': issue_key, 'id': existing[identity]}))
+                    continue
+                worklog = dict((name, value) for name, value in entry.items() if name != 'issue')
+                try:
+                    response = self.issue_add_json_worklog(issue_key, worklog)
+                    error = response_error(response)
+                except Exception as e:
+                    response, error = None, '{0}: {1}'.format(e.__class__.__name__, e)
+                if error is not None:
+                    results.append(('failed', {'index': index, 'issue': issue_key, 'error': error}))
+                    continue
+                worklog_id = (response or {}).get('id')
+                existing[identity] = worklog_id
+                results.append(('created', {'index': index, 'issue': issue_key, 'id': worklog_id}))
+            return results
+
+        for results in concurrent_map(write, by_issue.items(), max_workers=max_workers):
+            for status, result in results:
+                report[status].append(result)
+        for results in report.values():
+            results.sort(key=lambda result: result['index'])
+        log.info('Bulk worklogs: {0} created, {1} duplicates, {2} invalid, {3} failed'.format(
+            len(report['created']), len(report['duplicates']), len(report['invalid']), len(report['failed'])))
+        return report
+
     def issue_field_value(self, key, field):
         issue = self.get('rest/api/2/issue/{0}?fields={1}'.format(key, field))
         return issue['fields'][field]
@@ -617,9 +1246,54 @@ class Jira(AtlassianRestAPI):
             tab_id = screen_tab['id']
             if tab_id:
                 tab_fields = self.get_screen_tab_fields(screen_id=screen_id, tab_id=tab_id)
-                fields = fields + tab_fields
+                fields.extend(tab_fields)
         return fields
 
+    def get_all_screens(self):
+        """
+        Get all screens
+        :return:
+        """
+        url = 'rest/api/2/screens'
+        return self.get(url)
+
+    def get_screens_schema(self, screen_ids=None, max_workers=4, cache=None, max_age=86400):
+        """
+        Crawl the tabs and the tab fields of many screens concurrently into an indexed ScreenSchema
+        :param screen_ids: OPTIONAL: list of screen ids. Default: all screens
+        :param max_workers: OPTIONAL: number of concurrent requests. Default: 4
+        :param cache: OPTIONAL: file name, the schema is loaded from it when it is younger than max_age
+                and saved into it after the crawl
+        :param max_age: OPTIONAL: seconds to reuse the cached schema. Default: 86400
+        :return: ScreenSchema
+        """
+        if cache:
+            schema = ScreenSchema.load(cache, max_age=max_age)
+            if schema is not None:
+                return schema
+        if screen_ids is None:
+            screens = self.get_all_screens() or []
+            if isinstance(screens, dict):
+                screens = screens.get('values') or []
+            screen_ids = [screen['id'] for screen in screens]
+
+        def screen_tabs(screen_id):
+            return [(screen_id, tab) for tab in self.get_screen_tabs(screen_id) or [] if tab.get('id')]
+
+        tabs = [tab for tabs in concurrent_map(screen_tabs, screen_ids, max_workers=max_workers) for tab in tabs]
+
+        def tab_fields(item):
+            return self.get_screen_tab_fields(screen_id=item[0], tab_id=item[1]['id']) or []
+
+        schema = ScreenSchema()
+        for (screen_id, tab), fields in zip(tabs, concurrent_map(tab_fields, tabs, max_workers=max_workers)):
+            for field in fields:
+                schema.add({'screen_id': screen_id, 'tab_id': tab['id'], 'tab_name': tab.get('name'),
+                            'field_id': field.get('id'), 'field_name': field.get('name')})
+        if cache:
+            schema.save(cache)
+        return schema
+
     def get_issue_labels(self, issue_key):
         """
         Get issue labels.
@@ -651,32 +1325,68 @@ class Jira(AtlassianRestAPI):
         return custom_fields
 
     def project_leaders(self):
-        for project in self.projects():
-            key = project['key']
-            project_data = self.project(key)
-            lead = self.user(project_data['lead']['name'])
+        for row in self.project_inventory():
             yield {
-                'project_key': key,
-                'project_name': project['name'],
-                'lead_name': lead['displayName'],
-                'lead_key': lead['name'],
-                'lead_email': lead['emailAddress']}
+                'project_key': row['project_key'],
+                'project_name': row['project_name'],
+                'lead_name': row['lead_name'],
+                'lead_key': row['lead_key'],
+                'lead_email': row['lead_email']}
+
+    def project_inventory(self, max_workers=4):
+        """
+        Rows with project and lead details of all projects, e.g. for utils.html_table_from_dict
+        Leads and descriptions are expanded in the projects list, the projects missing them are fetched
+        concurrently, and every lead is fetched once for the email.
+        A project whose details can't be fetched is listed from the projects list
+        :param max_workers: OPTIONAL: number of concurrent requests. Default: 4
+        :return: generator of dicts with project_key, project_name, project_description,
+                 lead_name, lead_key and lead_email keys
+        """
+        projects = self.projects(expand='lead,description')
+        if not isinstance(projects, list):
+            raise HTTPError('Projects list failed: {}'.format(response_error(projects) or projects))
+        incomplete = [project['key'] for project in projects if not (project.get('lead') or {}).get('name')]
+        details = dict(zip(incomplete, concurrent_map(self.project, incomplete, max_workers=max_workers)))
+        for index, project in enumerate(projects):
+            detail = details.get(project['key'])
+            if detail is None:
+                continue
+            error = response_error(detail) if isinstance(detail, dict) else 'Unexpected response: {}'.format(detail)
+            if error is not None:
+                # the row is filled from the projects list
+                log.error('Failed to get the project {0}: {1}'.format(project['key'], error))
+                continue
+            projects[index] = detail
+        lead_names = list(OrderedDict.fromkeys(
+            (project.get('lead') or {}).get('name') for project in projects if (project.get('lead') or {}).get('name')))
+        leads = dict(zip(lead_names, concurrent_map(self.user, lead_names, max_workers=max_workers)))
+        for project in projects:
+            lead = project.get('lead') or {}
+            user = leads.get(lead.get('name')) or {}
+            yield {
+                'project_key': project['key'],
+                'project_name': project.get('name'),
+                'project_description': project.get('description'),
+                'lead_name': user.get('displayName') or lead.get('displayName'),
+                'lead_key': user.get('name') or lead.get('name'),
+                'lead_email': user.get('emailAddress')}
 
     def get_project_issuekey_last(self, project):
         jql = 'project = {project} ORDER BY issuekey DESC'.format(project=project)
-        return (self.jql(jql).get('issues') or {})[0]['key']
+        return (self.jql(jql, fields='*none', limit=1).get('issues') or {})[0]['key']
 
     def get_project_issuekey_all(self, project):
         jql = 'project = {project} ORDER BY issuekey ASC'.format(project=project)
-        return [issue['key'] for issue in self.jql(jql)['issues']]
+        return [issue['key'] for issue in self.jql_iter(jql, fields='*none')]
 
     def get_project_issues_count(self, project):
         jql = 'project = "{project}" '.format(project=project)
-        return self.jql(jql, fields='*none')['total']
+        return self.jql_count(jql)
 
-    def get_all_project_issues(self, project, fields='*all'):
+    def get_all_project_issues(self, project, fields=None):
         jql = 'project = {project} ORDER BY key'.format(project=project)
-        return self.jql(jql, fields=fields)['issues']
+        return list(self.jql_iter(jql, fields=fields))
 
     def get_all_assignable_users_for_project(self, project_key, start=0, limit=50):
         """
@@ -788,6 +1498,95 @@ class Jira(AtlassianRestAPI):
         params['maxResults'] = limit
         return self.get(url, params=params)
 
+    def get_all_users_from_group_iter(self, group, include_inactive_users=False, page_size=50):
+        """
+        Generator over all users of the group, page by page. A failed page raises HTTPError
+        :param group:
+        :param include_inactive_users:
+        :param page_size: OPTIONAL: users per request. Default: 50
+        :return: generator of users
+        """
+        start = 0
+        while True:
+            response = self._checked_page(
+                self.get_all_users_from_group(group, include_inactive_users=include_inactive_users,
+                                              start=start, limit=page_size),
+                'values', 'Members of the group {0} at {1}'.format(group, start))
+            values = response['values']
+            for user in values:
+                yield user
+            start += len(values)
+            if response.get('isLast', True) or not values:
+                break
+
+    def group_membership_snapshot(self, groups=None, include_inactive_users=True, max_workers=4):
+        """
+        Snapshot of the members of many groups, the groups are paged concurrently.
+        A failed request raises HTTPError, so a group is never taken for empty
+        :param groups: OPTIONAL: list of group names. Default: all groups returned by the group picker,
+                which is capped by the jira.ajax.autocomplete.limit property: HTTPError is raised
+                when the picker does not return all the groups
+        :param include_inactive_users: OPTIONAL: Default: True
+        :param max_workers: OPTIONAL: number of concurrent requests. Default: 4
+        :return: GroupSnapshot
+        """
+        if groups is None:
+            picker = self._checked_page(self.get_groups(limit=10000), 'groups', 'Group picker')
+            groups = [group['name'] for group in picker['groups']]
+            if (picker.get('total') or 0) > len(groups):
+                raise HTTPError('Group picker returned {0} of {1} groups, pass the groups explicitly'.format(
+                    len(groups), picker['total']))
+
+        def members(group):
+            return list(self.get_all_users_from_group_iter(group, include_inactive_users=include_inactive_users))
+
+        snapshot = GroupSnapshot()
+        for group, users in zip(groups, concurrent_map(members, groups, max_workers=max_workers)):
+            snapshot.add_group(group)
+            for user in users:
+                snapshot.add(group, user['name'], {'active': user.get('active'),
+                                                   'displayName': user.get('displayName'),
+                                                   'emailAddress': user.get('emailAddress')})
+        return snapshot
+
+    def reconcile_group_membership(self, desired, current=None, remove=True, max_workers=4):
+        """
+        Apply the desired membership of the groups with the minimal add and remove calls, made concurrently.
+        Only the groups of the desired state are changed
+        :param desired: GroupSnapshot or dict group name -> iterable of user names
+        :param current: OPTIONAL: GroupSnapshot of the current state. Default: fresh snapshot of the desired groups
+        :param remove: OPTIONAL: remove the members missing in the desired state. Default: True
+        :param max_workers: OPTIONAL: number of concurrent requests. Default: 4
+        :return: dict with added and removed lists of (user name, group) pairs and failed dict pair -> error
+        """
+        if not isinstance(desired, GroupSnapshot):
+            desired = GroupSnapshot(desired)
+        if current is None:
+            current = self.group_membership_snapshot(desired.groups(), max_workers=max_workers)
+        diff = current.diff(desired)
+        calls = [('add', pair) for pair in sorted(diff['add'])]
+        if remove:
+            calls += [('remove', pair) for pair in sorted(diff['remove'])]
+
+        def apply(call):
+            action, (username, group) = call
+            try:
+                if action == 'add':
+                    return response_error(self.add_user_to_group(username, group))
+                return response_error(self.remove_user_from_group(username, group))
+            except Exception as e:
+                return '{0}: {1}'.format(e.__class__.__name__, e)
+
+        report = {'added': [], 'removed': [], 'failed': {}}
+        for (action, pair), error in zip(calls, concurrent_map(apply, calls, max_workers=max_workers)):
+            if error is not None:
+                report['failed'][pair] = error
+            elif action == 'add':
+                report['added'].append(pair)
+            else:
+                report['removed'].append(pair)
+        return report
+
     def add_user_to_group(self, username, group_name):
         """
         Add given user to a group
@@ -843,6 +1642,88 @@ class Jira(AtlassianRestAPI):
         url = 'rest/api/2/issue/{0}'.format(issue_key)
         return self.put(url, data={'fields': fields})
 
+    @staticmethod
+    def field_value_matches(current, value):
+        """
+        Whether the current field value already satisfies the value of an update.
+        Objects match when the current one has all the keys of the value, e.g. {'name': 'High'}
+        matches the full priority object, and lists match regardless of the order
+        :param current: field value of the issue
+        :param value: field value of the update
+        :return: bool
+        """
+        if isinstance(value, dict):
+            return isinstance(current, dict) and all(Jira.field_value_matches(current.get(name), item)
+                                                      for name, item in value.items())
+        if isinstance(value, list):
+            if not isinstance(current, list) or len(current) != len(value):
+                return False
+            remaining = list(current)
+            for item in value:
+                for index, candidate in enumerate(remaining):
+                    if Jira.field_value_matches(candidate, item):
+                        del remaining[index]
+                        break
+                else:
+                    return False
+            return True
+        if value is None or value == '':
+            return current is None or current == '' or current == []
+        return current == value
+
+    def bulk_update_issues(self, updates, notify_users=False, chunk_size=200, max_workers=4):
+        """
+        Update fields of many issues, skipping the updates which would not change anything.
+        The current values are fetched with bulk searches of the updated fields only,
+        and the remaining updates are sent concurrently
+        :param updates: dict issue key -> fields, or list of (issue key, fields) pairs
+        :param notify_users: OPTIONAL: send the update notifications. Disabling them requires
+                the administer permission of the project, without it the update is repeated with notifications.
+                Default: False
+        :param chunk_size: OPTIONAL: keys per search. Default: 200
+        :param max_workers: OPTIONAL: number of concurrent requests. Default: 4
+        :return: dict with changed and skipped (no-op) keys and failed keys with errors
+        """
+        if isinstance(updates, dict):
+            updates = updates.items()
+        merged = OrderedDict()
+        for issue_key, fields in updates:
+            merged.setdefault(issue_key, {}).update(fields)
+        field_names = sorted(set(name for fields in merged.values() for name in fields))
+        issues, missing = self.bulk_issue_map(list(merged), fields=field_names or ['key'],
+                                              chunk_size=chunk_size, max_workers=max_workers)
+        report = {'changed': [], 'skipped': [], 'failed': dict((key, 'Issue not found') for key in missing)}
+        todo = []
+        for issue_key, issue in issues.items():
+            current = issue.get('fields') or {}
+            changes = dict((name, value) for name, value in merged[issue_key].items()
+                           if not self.field_value_matches(current.get(name), value))
+            if changes:
+                todo.append((issue_key, changes))
+            else:
+                report['skipped'].append(issue_key)
+
+        def update(item):
+            url = 'rest/api/2/issue/{0}'.format(item[0])
+            try:
+                if notify_users:
+                    return response_error(self.put(url, data={'fields': item[1]}))
+                error = response_error(self.put(url, data={'fields': item[1]}, params={'notifyUsers': 'false'}))
+                if error is not None and 'notif' in error.lower():
+                    error = response_error(self.put(url, data={'fields': item[1]}))
+                return error
+            except Exception as e:
+                return '{0}: {1}'.format(e.__class__.__name__, e)
+
+        for (issue_key, __), error in zip(todo, concurrent_map(update, todo, max_workers=max_workers)):
+            if error is None:
+                report['changed'].append(issue_key)
+            else:
+                report['failed'][issue_key] = error
+        log.info('Bulk update: {0} changed, {1} skipped, {2} failed'.format(
+            len(report['changed']), len(report['skipped']), len(report['failed'])))
+        return report
+
     def issue_add_watcher(self, issue_key, user):
         """
         Start watching issue
@@ -917,6 +1798,91 @@ class Jira(AtlassianRestAPI):
 
             return self.post(url, headers=headers, files=files)
 
+    def download_attachment(self, attachment, path, chunk_size=65536):
+        """
+        Stream the content of the attachment into the file, through a .part file renamed once complete
+        :param attachment: attachment metadata, with id, filename and size
+        :param path: file name
+        :param chunk_size: OPTIONAL: bytes read at a time. Default: 65536
+        :return: None or error message
+        """
+        url = 'secure/attachment/{0}/{1}'.format(attachment['id'], quote(attachment['filename'].encode('utf-8'), safe=''))
+        part_path = path + '.part'
+        try:
+            response = self.request('GET', url, headers={'Accept': '*/*'}, stream=True)
+            try:
+                error = response_error(response)
+                if error is not None:
+                    return error
+                size = 0
+                with open(part_path, 'wb') as stream:
+                    for chunk in response.iter_content(chunk_size):
+                        stream.write(chunk)
+                        size += len(chunk)
+            finally:
+                response.close()
+            if attachment.get('size') is not None and size != attachment['size']:
+                return 'Incomplete download: {0} of {1} bytes'.format(size, attachment['size'])
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(part_path, path)
+            return None
+        except Exception as e:
+            return '{0}: {1}'.format(e.__class__.__name__, e)
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+    def mirror_attachments(self, directory, jql=None, issue_keys=None, max_workers=4):
+        """
+        Download the attachments of many issues into directory/ISSUE-KEY/ID_FILENAME.
+        The attachment metadata comes from bulk searches with the attachment field only,
+        the files are streamed concurrently, and the files already present with the expected size are skipped,
+        so an interrupted mirroring resumes with the missing files
+        :param directory: target directory
+        :param jql: OPTIONAL: search of the issues
+        :param issue_keys: OPTIONAL: list of issue keys, used without jql
+        :param max_workers: OPTIONAL: number of concurrent downloads. Default: 4
+        :return: dict with downloaded and skipped attachment ids, failed attachment ids with errors and bytes
+        """
+        if jql:
+            issues = self.jql_iter(jql, fields=['attachment'], max_workers=max_workers)
+        else:
+            issues = self.bulk_issue_map(issue_keys or [], fields=['attachment'], max_workers=max_workers)[0].values()
+
+        def attachments():
+            for issue in issues:
+                for attachment in (issue.get('fields') or {}).get('attachment') or []:
+                    yield issue['key'], attachment
+
+        def mirror(item):
+            issue_key, attachment = item
+            issue_directory = os.path.join(directory, issue_key)
+            filename = re.sub(r'[\\/:*?"<>|]', '_', attachment['filename'])
+            path = os.path.join(issue_directory, '{0}_{1}'.format(attachment['id'], filename))
+            if os.path.isfile(path) and os.path.getsize(path) == attachment.get('size'):
+                return attachment, 'skipped', None
+            try:
+                os.makedirs(issue_directory)
+            except OSError as e:
+                if not os.path.isdir(issue_directory):
+                    return attachment, 'failed', '{0}: {1}'.format(e.__class__.__name__, e)
+            error = self.download_attachment(attachment, path)
+            return attachment, 'downloaded' if error is None else 'failed', error
+
+        report = {'downloaded': [], 'skipped': [], 'failed': {}, 'bytes': 0}
+        for attachment, status, error in concurrent_map(mirror, attachments(), max_workers=max_workers):
+            if status == 'failed':
+                log.error('Failed attachment {0}: {1}'.format(attachment['id'], error))
+                report['failed'][attachment['id']] = error
+                continue
+            report[status].append(attachment['id'])
+            if status == 'downloaded':
+                report['bytes'] += attachment.get('size') or 0
+        log.info('Attachments: {0} downloaded, {1} skipped, {2} failed'.format(
+            len(report['downloaded']), len(report['skipped']), len(report['failed'])))
+        return report
+
     def get_issue_remotelinks(self, issue_key, global_id=None, internal_id=None):
         """
         Compatibility naming method with get_issue_remote_links()
@@ -1033,6 +1999,86 @@ class Jira(AtlassianRestAPI):
         transition_id = self.get_transition_id_to_status_name(issue_key, status_name)
         return self.post(url, data={'transition': {'id': transition_id}})
 
+    @staticmethod
+    def transition_context(issue):
+        """
+        Transitions cache key of the issue: the available transitions depend on the workflow,
+        selected by project and issue type, and on the current status
+        :param issue: issue with project, issuetype and status fields
+        :return: tuple
+        """
+        fields = issue.get('fields') or {}
+        return ((fields.get('project') or {}).get('key'),
+                (fields.get('issuetype') or {}).get('id'),
+                (fields.get('status') or {}).get('id'))
+
+    def get_transition_id_cached(self, issue, status_name):
+        """
+        Get the transition id to status name, the transitions are fetched once per transition context
+        :param issue: issue with project, issuetype and status fields
+        :param status_name:
+        :return: transition id or None, a failed request raises HTTPError and is not cached
+        """
+        context = self.transition_context(issue)
+        if context not in self._transitions_cache:
+            response = self._checked_page(self.get_issue_transitions_full(issue['key']), 'transitions',
+                                          'Transitions of {}'.format(issue['key']))
+            self._transitions_cache[context] = response['transitions']
+        for transition in self._transitions_cache[context]:
+            if status_name.lower() == transition['to']['name'].lower():
+                return int(transition['id'])
+        return None
+
+    def clear_transitions_cache(self):
+        self._transitions_cache = {}
+
+    def bulk_set_issue_status(self, issue_keys, status_name, max_workers=4):
+        """
+        Move many issues to the status.
+        Issues are grouped by project, issue type and current status, the transition is resolved once per group
+        and the transitions are posted concurrently
+        :param issue_keys: list of issue keys
+        :param status_name:
+        :param max_workers: OPTIONAL: number of concurrent requests. Default: 4
+        :return: dict with transitioned and skipped (already in the status) keys and failed keys with errors
+        """
+        issues, missing = self.bulk_issue_map(issue_keys, fields=['project', 'issuetype', 'status'],
+                                              max_workers=max_workers)
+        report = {'transitioned': [], 'skipped': [], 'failed': dict((key, 'Issue not found') for key in missing)}
+        groups = OrderedDict()
+        for key, issue in issues.items():
+            if ((issue['fields'].get('status') or {}).get('name') or '').lower() == status_name.lower():
+                report['skipped'].append(key)
+                continue
+            groups.setdefault(self.transition_context(issue), []).append(issue)
+        todo = []
+        for group in groups.values():
+            try:
+                transition_id = self.get_transition_id_cached(group[0], status_name)
+                error = None if transition_id is not None else 'No transition to {}'.format(status_name)
+            except Exception as e:
+                error = '{0}: {1}'.format(e.__class__.__name__, e)
+            if error is not None:
+                for issue in group:
+                    report['failed'][issue['key']] = error
+                continue
+            todo.extend((issue['key'], transition_id) for issue in group)
+
+        def transition(item):
+            try:
+                return response_error(self.set_issue_status_by_transition_id(item[0], item[1]))
+            except Exception as e:
+                return '{0}: {1}'.format(e.__class__.__name__, e)
+
+        for (key, __), error in zip(todo, concurrent_map(transition, todo, max_workers=max_workers)):
+            if error is None:
+                report['transitioned'].append(key)
+            else:
+                report['failed'][key] = error
+        log.info('Transitioned {0} issues to {1}, {2} failed'.format(len(report['transitioned']), status_name,
+                                                                    len(report['failed'])))
+        return report
+
     def set_issue_status_by_transition_id(self, issue_key, transition_id):
         """
         Setting status by transition_id
@@ -1168,6 +2214,85 @@ class Jira(AtlassianRestAPI):
         url = 'rest/api/2/issueLink/{}'.format(link_id)
         return self.get(url)
 
+    @staticmethod
+    def issue_relations(issue, link_types=None, include_subtasks=True):
+        """
+        Linked issues of the issue, from its issuelinks, subtasks and parent fields
+        :param issue: issue with the issuelinks, subtasks and parent fields
+        :param link_types: OPTIONAL: names of the followed link types, e.g. ['Blocks']. Default: all types
+        :param include_subtasks: OPTIONAL: follow the subtasks and the parent. Default: True
+        :return: list of (issue key, relation) pairs, the relation is the inward or outward description
+                of the link type, 'subtask' or 'parent'
+        """
+        fields = issue.get('fields') or {}
+        relations = []
+        for link in fields.get('issuelinks') or []:
+            link_type = link.get('type') or {}
+            if link_types is not None and link_type.get('name') not in link_types:
+                continue
+            if link.get('outwardIssue'):
+                relations.append((link['outwardIssue']['key'], link_type.get('outward')))
+            elif link.get('inwardIssue'):
+                relations.append((link['inwardIssue']['key'], link_type.get('inward')))
+        if include_subtasks:
+            relations.extend((subtask['key'], 'subtask') for subtask in fields.get('subtasks') or [])
+            if fields.get('parent'):
+                relations.append((fields['parent']['key'], 'parent'))
+        return relations
+
+    def issue_link_graph(self, issue_keys=None, jql=None, max_depth=2, link_types=None, include_subtasks=True,
+                         chunk_size=200, max_workers=4):
+        """
+        Breadth-first traversal of the issue links, subtasks and parents.
+        Each level is fetched with bulk searches of its keys, so a level costs a few requests whatever its size
+        :param issue_keys: OPTIONAL: keys of the start issues
+        :param jql: OPTIONAL: search of the start issues
+        :param max_depth: OPTIONAL: number of links followed from the start issues. Default: 2
+        :param link_types: OPTIONAL: names of the followed link types, e.g. ['Blocks']. Default: all types
+        :param include_subtasks: OPTIONAL: follow the subtasks and the parents. Default: True
+        :param chunk_size: OPTIONAL: keys per search. Default: 200
+        :param max_workers: OPTIONAL: number of searches sent concurrently. Default: 4
+        :return: dict with adjacency (issue key -> list of (linked key, relation) pairs of the expanded issues),
+                depth (issue key -> level of the issue) and missing (keys not found or not visible)
+        """
+        fields = ['issuelinks', 'subtasks', 'parent']
+        graph = {'adjacency': OrderedDict(), 'depth': OrderedDict(), 'missing': []}
+        if jql:
+            issues = OrderedDict((issue['key'], issue) for issue in self.jql_iter(jql, fields=fields,
+                                                                                   max_workers=max_workers))
+        else:
+            issues = None
+        frontier = list(OrderedDict.fromkeys(issue_keys or []))
+        if issues is not None:
+            frontier = [key for key in frontier if key not in issues]
+        for key in list(issues or []) + frontier:
+            graph['depth'].setdefault(key, 0)
+        level = 0
+        while level < max_depth:
+            if frontier:
+                found, missing = self.bulk_issue_map(frontier, fields=fields, chunk_size=chunk_size,
+                                                     max_workers=max_workers)
+                graph['missing'].extend(missing)
+            else:
+                found = OrderedDict()
+            if issues:
+                issues.update(found)
+                found = issues
+                issues = None
+            if not found:
+                break
+            frontier = []
+            for key, issue in found.items():
+                relations = self.issue_relations(issue, link_types=link_types, include_subtasks=include_subtasks)
+                graph['adjacency'][key] = relations
+                for linked_key, __ in relations:
+                    if linked_key not in graph['depth']:
+                        graph['depth'][linked_key] = level + 1
+                        frontier.append(linked_key)
+            level += 1
+            log.info('Issue links level {0}: {1} issues expanded, {2} new'.format(level, len(found), len(frontier)))
+        return graph
+
     def create_filter(self, name, jql, description=None, favourite=False):
         """
         :param name: str
@@ -1709,6 +2834,108 @@ class Jira(AtlassianRestAPI):
         url = 'rest/tempo-timesheets/3/worklogs/'
         return self.get(url, params=params)
 
+    def tempo_timesheets_worklogs_iter(self, date_from, date_to, username=None, project_key=None, account_key=None,
+                                       team_id=None, window_days=7, max_worklogs=5000, max_workers=4):
+        """
+        Generator over the worklogs of a long period, fetched by date windows instead of one huge request.
+        A window which fails, e.g. on timeout, is split in halves and fetched again,
+        and the next windows shrink when a window returns more than max_worklogs worklogs,
+        so only max_workers windows of bounded size are held in memory
+        :param date_from: yyyy-MM-dd
+        :param date_to: yyyy-MM-dd
+        :param username: OPTIONAL: name of the user you wish to get the worklogs for
+        :param project_key: OPTIONAL: key of a project you wish to get the worklogs for
+        :param account_key: OPTIONAL: key of an account you wish to get the worklogs for
+        :param team_id: OPTIONAL: id of the Team you wish to get the worklogs for
+        :param window_days: OPTIONAL: days per request at the start. Default: 7
+        :param max_worklogs: OPTIONAL: worklogs per request above which the windows shrink. Default: 5000
+        :param max_workers: OPTIONAL: number of windows fetched concurrently. Default: 4
+        :return: generator of worklogs, in the order of the windows
+        """
+        first_day = datetime.strptime(date_from, '%Y-%m-%d').date()
+        last_day = datetime.strptime(date_to, '%Y-%m-%d').date()
+        state = {'days': max(1, window_days)}
+
+        def windows():
+            start = first_day
+            while start <= last_day:
+                end = min(last_day, start + timedelta(days=state['days'] - 1))
+                yield start, end
+                start = end + timedelta(days=1)
+
+        def fetch(window):
+            start, end = window
+            days = (end - start).days + 1
+            try:
+                worklogs = self.tempo_timesheets_get_worklogs(date_from=start.isoformat(), date_to=end.isoformat(),
+                                                              username=username, project_key=project_key,
+                                                              account_key=account_key, team_id=team_id)
+                error = None if isinstance(worklogs, list) else (response_error(worklogs) or
+                                                                 'Unexpected response: {}'.format(worklogs))
+            except Exception as e:
+                worklogs, error = None, '{0}: {1}'.format(e.__class__.__name__, e)
+            if error is None:
+                if len(worklogs) > max_worklogs and days > 1:
+                    state['days'] = max(1, min(state['days'], days // 2))
+                return worklogs
+            if days == 1:
+                raise HTTPError('Failed to get the worklogs of {0}: {1}'.format(start.isoformat(), error))
+            log.warning('Split the worklogs window {0} - {1}: {2}'.format(start.isoformat(), end.isoformat(), error))
+            state['days'] = max(1, min(state['days'], days // 2))
+            middle = start + timedelta(days=days // 2 - 1)
+            return fetch((start, middle)) + fetch((middle + timedelta(days=1), end))
+
+        for worklogs in concurrent_map(fetch, windows(), max_workers=max_workers):
+            for worklog in worklogs:
+                yield worklog
+
+    @staticmethod
+    def tempo_worklog_account(worklog):
+        """
+        Account key of the Tempo worklog, or None
+        """
+        for attribute in worklog.get('worklogAttributes') or []:
+            if attribute.get('key') == '_Account_':
+                return attribute.get('value')
+        return (worklog.get('account') or {}).get('key')
+
+    @staticmethod
+    def tempo_worklog_tally(worklogs, totals):
+        """
+        Pass the worklogs through while adding their time to the totals,
+        so they can be exported and aggregated in one pass
+        :param worklogs: iterable of Tempo worklogs
+        :param totals: dict, updated with count, seconds and the seconds per user and per account
+        :return: generator of worklogs
+        """
+        totals.setdefault('count', 0)
+        totals.setdefault('seconds', 0)
+        users = totals.setdefault('users', {})
+        accounts = totals.setdefault('accounts', {})
+        for worklog in worklogs:
+            seconds = worklog.get('timeSpentSeconds') or 0
+            author = worklog.get('author') or worklog.get('worker') or {}
+            user = (author.get('name') or author.get('key')) if isinstance(author, dict) else author
+            account = Jira.tempo_worklog_account(worklog)
+            totals['count'] += 1
+            totals['seconds'] += seconds
+            users[user] = users.get(user, 0) + seconds
+            accounts[account] = accounts.get(account, 0) + seconds
+            yield worklog
+
+    def tempo_timesheets_worklog_totals(self, date_from, date_to, **kwargs):
+        """
+        Time spent per user and per account over a long period, without keeping the worklogs
+        :param date_from: yyyy-MM-dd
+        :param date_to: yyyy-MM-dd
+        :param kwargs: OPTIONAL: filters and windows of tempo_timesheets_worklogs_iter()
+        :return: dict with count, seconds, users and accounts
+        """
+        totals = {}
+        for __ in self.tempo_worklog_tally(self.tempo_timesheets_worklogs_iter(date_from, date_to, **kwargs), totals):
+            pass
+        return totals
+
     def tempo_timesheets_write_worklog(self, worker, started, time_spend_in_seconds, issue_id, comment=None):
         """
 
@@ -1895,12 +3122,26 @@ class Jira(AtlassianRestAPI):
         url = 'rest/agile/1.0/board/{}/configuration'.format(str(board_id))
         return self.get(url)
 
-    def get_issues_for_backlog(self, board_id):
+    def get_issues_for_backlog(self, board_id, start=0, limit=50, fields=None, jql=None):
         """
+        Returns the issues of the board backlog, ordered by rank
         :param board_id: int, str
+        :param start: OPTIONAL: The starting index of the returned issues. Base index: 0.
+        :param limit: OPTIONAL: The maximum number of issues to return per page. Default: 50.
+        :param fields: OPTIONAL: list of fields or fields profile name. Default: all fields
+        :param jql: OPTIONAL: filter of the backlog issues
         """
-        url = 'rest/agile/1.0/{board_id}/backlog'.format(board_id=board_id)
-        return self.get(url)
+        url = 'rest/agile/1.0/board/{board_id}/backlog'.format(board_id=board_id)
+        params = {}
+        if start:
+            params['startAt'] = start
+        if limit:
+            params['maxResults'] = limit
+        if fields is not None:
+            params['fields'] = self.resolve_fields(fields)
+        if jql:
+            params['jql'] = jql
+        return self._track_fields(self.get(url, params=params))
 
     def delete_agile_board(self, board_id):
         """
@@ -1999,7 +3240,7 @@ class Jira(AtlassianRestAPI):
         """
         return self.post('rest/agile/1.0/sprint/{}'.format(sprint_id), data=data)
 
-    def get_sprint_issues(self, sprint_id, start, limit):
+    def get_sprint_issues(self, sprint_id, start=0, limit=50, fields=None, jql=None):
         """
         Returns all issues in a sprint, for a given sprint Id.
         This only includes issues that the user has permission to view.
@@ -2014,6 +3255,8 @@ class Jira(AtlassianRestAPI):
                       Note, the total number of issues returned is limited by the property
                       'jira.search.views.default.max' in your Jira instance.
                       If you exceed this limit, your results will be truncated.
+        :param fields: OPTIONAL: list of fields or fields profile name. Default: all fields
+        :param jql: OPTIONAL: filter of the sprint issues
         :return:
         """
         params = {}
@@ -2021,8 +3264,136 @@ class Jira(AtlassianRestAPI):
             params['startAt'] = start
         if limit:
             params['maxResults'] = limit
+        if fields is not None:
+            params['fields'] = self.resolve_fields(fields)
+        if jql:
+            params['jql'] = jql
         url = 'rest/agile/1.0/sprint/{sprintId}/issue'.format(sprintId=sprint_id)
-        return self.get(url, params=params)
+        return self._track_fields(self.get(url, params=params))
+
+    def _agile_iter(self, url, key='values', params=None, page_size=50):
+        """
+        Generator over all pages of an agile resource.
+        The lists of boards and sprints end with isLast, the lists of issues with total.
+        A failed page raises HTTPError
+        """
+        params = dict(params or {})
+        start = 0
+        while True:
+            params['startAt'] = start
+            params['maxResults'] = page_size
+            response = self._checked_page(self.get(url, params=params), key, 'Page of {0} at {1}'.format(url, start))
+            if key == 'issues':
+                response = self._track_fields(response)
+            values = response[key]
+            for value in values:
+                yield value
+            # the server can cap the page size
+            start += len(values)
+            if not values or response.get('isLast') or ('total' in response and start >= response['total']):
+                return
+
+    def agile_boards_iter(self, board_name=None, project_key=None, board_type=None, page_size=50):
+        """
+        Generator over all boards the user has permission to view
+        :param board_name: OPTIONAL: filter by the board name
+        :param project_key: OPTIONAL: filter by the project key or id
+        :param board_type: OPTIONAL: scrum or kanban
+        :param page_size: OPTIONAL: boards per request. Default: 50
+        :return: generator of boards
+        """
+        params = {}
+        if board_name:
+            params['name'] = board_name
+        if project_key:
+            params['projectKeyOrId'] = project_key
+        if board_type:
+            params['type'] = board_type
+        return self._agile_iter('rest/agile/1.0/board', params=params, page_size=page_size)
+
+    def agile_sprints_iter(self, board_id, state=None, page_size=50):
+        """
+        Generator over all sprints of the board
+        :param board_id:
+        :param state: OPTIONAL: future, active, closed, or several states separated by commas
+        :param page_size: OPTIONAL: sprints per request. Default: 50
+        :return: generator of sprints
+        """
+        params = {}
+        if state:
+            params['state'] = state
+        url = 'rest/agile/1.0/board/{boardId}/sprint'.format(boardId=board_id)
+        return self._agile_iter(url, params=params, page_size=page_size)
+
+    def sprint_issues_iter(self, sprint_id, fields=None, jql=None, page_size=50):
+        """
+        Generator over all issues of the sprint, ordered by rank
+        :param sprint_id:
+        :param fields: OPTIONAL: list of fields or fields profile name. Default: the client fields profile
+        :param jql: OPTIONAL: filter of the sprint issues
+        :param page_size: OPTIONAL: issues per request. Default: 50
+        :return: generator of issues
+        """
+        params = {'fields': self.resolve_fields(fields)}
+        if jql:
+            params['jql'] = jql
+        url = 'rest/agile/1.0/sprint/{sprintId}/issue'.format(sprintId=sprint_id)
+        return self._agile_iter(url, key='issues', params=params, page_size=page_size)
+
+    def backlog_issues_iter(self, board_id, fields=None, jql=None, page_size=50):
+        """
+        Generator over all issues of the board backlog, ordered by rank
+        :param board_id:
+        :param fields: OPTIONAL: list of fields or fields profile name. Default: the client fields profile
+        :param jql: OPTIONAL: filter of the backlog issues
+        :param page_size: OPTIONAL: issues per request. Default: 50
+        :return: generator of issues
+        """
+        params = {'fields': self.resolve_fields(fields)}
+        if jql:
+            params['jql'] = jql
+        url = 'rest/agile/1.0/board/{board_id}/backlog'.format(board_id=board_id)
+        return self._agile_iter(url, key='issues', params=params, page_size=page_size)
+
+    def agile_board_snapshots(self, board_ids=None, fields=None, backlog=True, max_workers=4):
+        """
+        Configuration, active sprints with their issues and backlog of many boards.
+        The boards are processed concurrently, each snapshot is yielded as soon as its window is done,
+        a failed request of a board is reported in its error
+        :param board_ids: OPTIONAL: list of board ids. Default: all boards
+        :param fields: OPTIONAL: issue fields, list or fields profile name. Default: the client fields profile
+        :param backlog: OPTIONAL: include the backlog issues. Default: True
+        :param max_workers: OPTIONAL: number of boards processed concurrently. Default: 4
+        :return: generator of dicts with board_id, configuration, active_sprints, sprint_issues
+                (sprint id -> issues), backlog and error
+        """
+        if board_ids is None:
+            board_ids = (board['id'] for board in self.agile_boards_iter())
+
+        def snapshot(board_id):
+            result = {'board_id': board_id, 'configuration': None, 'active_sprints': [], 'sprint_issues': {},
+                      'backlog': [], 'error': None}
+            try:
+                configuration = self.get_agile_board_configuration(board_id)
+                error = response_error(configuration) if isinstance(configuration, dict) else \
+                    'Unexpected response: {}'.format(configuration)
+                if error is not None:
+                    raise HTTPError('Configuration of the board {0} failed: {1}'.format(board_id, error))
+                result['configuration'] = configuration
+                # kanban boards have neither sprints nor backlog
+                if configuration.get('type') == 'kanban':
+                    return result
+                result['active_sprints'] = list(self.agile_sprints_iter(board_id, state='active'))
+                for sprint in result['active_sprints']:
+                    result['sprint_issues'][sprint['id']] = list(self.sprint_issues_iter(sprint['id'], fields=fields))
+                if backlog:
+                    result['backlog'] = list(self.backlog_issues_iter(board_id, fields=fields))
+            except Exception as e:
+                result['error'] = '{0}: {1}'.format(e.__class__.__name__, e)
+                log.error('Failed snapshot of the board {0}: {1}'.format(board_id, result['error']))
+            return result
+
+        return concurrent_map(snapshot, board_ids, max_workers=max_workers)
 
     def health_check(self):
         """
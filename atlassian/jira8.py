@@ -1,5 +1,8 @@
 # coding=utf-8
+import json
 import logging
+from .bulk import concurrent_map, response_error
+from .jira_permissions import PermissionCache
 from .rest_client import AtlassianRestAPI
 
 log = logging.getLogger(__name__)
@@ -34,6 +37,15 @@ class Jira8(AtlassianRestAPI):
 
         return self.get(url, params=params)
 
+    @property
+    def permission_cache(self):
+        """
+        Cache of the permissions of the current user by project and issue, see PermissionCache
+        """
+        if getattr(self, '_permission_cache', None) is None:
+            self._permission_cache = PermissionCache(self)
+        return self._permission_cache
+
     def get_all_permissions(self):
         """
         Returns all permissions that are present in the JIRA instance - Global, Project
@@ -172,6 +184,46 @@ class Jira8(AtlassianRestAPI):
 
         return self.post(url, data=data)
 
+    def bulk_create_issues(self, list_of_issues_data, chunk_size=50, max_workers=4):
+        """
+        Creates any number of issues, by chunks of the server bulk size posted concurrently.
+        The created keys and the errors of the failed elements are mapped back to the input rows
+
+        :param list_of_issues_data: list of JSON data, e.g. {'fields': {...}}
+        :param chunk_size: issues per bulk request, the server accepts 50 by default
+        :param max_workers: number of concurrent requests
+        :return: dict with created list of {'index', 'id', 'key'} and failed list of {'index', 'error', 'data'},
+                 failed data can be passed again for retry
+        """
+        rows = list(list_of_issues_data)
+        offsets = range(0, len(rows), chunk_size)
+
+        def create(offset):
+            return self.create_issues(rows[offset:offset + chunk_size])
+
+        report = {'created': [], 'failed': []}
+        for offset, response in zip(offsets, concurrent_map(create, offsets, max_workers=max_workers)):
+            size = len(rows[offset:offset + chunk_size])
+            if not isinstance(response, dict) or ('issues' not in response and 'errors' not in response):
+                error = response_error(response) or 'Unexpected response: {}'.format(response)
+                errors = dict((number, error) for number in range(size))
+            else:
+                errors = dict((error.get('failedElementNumber'), json.dumps(error.get('elementErrors')))
+                              for error in response.get('errors') or [])
+            # the created issues are listed in the order of the successful elements
+            created = iter(response.get('issues') or [] if isinstance(response, dict) else [])
+            for number in range(size):
+                index = offset + number
+                issue = None if number in errors else next(created, None)
+                if issue is None:
+                    report['failed'].append({'index': index,
+                                             'error': errors.get(number, 'Missing in the response'),
+                                             'data': rows[index]})
+                else:
+                    report['created'].append({'index': index, 'id': issue.get('id'), 'key': issue.get('key')})
+        log.info('Created {0} issues, {1} failed'.format(len(report['created']), len(report['failed'])))
+        return report
+
     def delete_issue(self, issue_id_or_key, delete_subtasks=True):
         """
         Delete an issue
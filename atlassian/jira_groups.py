@@ -0,0 +1,81 @@
+# coding=utf-8
+import io
+import json
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class GroupSnapshot(object):
+    """
+    Group membership indexed as group -> users and user -> groups sets
+    """
+
+    def __init__(self, group_users=None, users=None):
+        """
+        :param group_users: dict group name -> iterable of user names, e.g. the desired state
+        :param users: OPTIONAL: dict user name -> user details, e.g. {'active': True}
+        """
+        self.group_users = {}
+        self.user_groups = {}
+        self.users = dict(users or {})
+        for group, members in (group_users or {}).items():
+            self.add_group(group)
+            for username in members:
+                self.add(group, username)
+
+    def add_group(self, group):
+        self.group_users.setdefault(group, set())
+
+    def add(self, group, username, user=None):
+        self.group_users.setdefault(group, set()).add(username)
+        self.user_groups.setdefault(username, set()).add(group)
+        if user is not None:
+            self.users[username] = user
+
+    def groups(self):
+        return sorted(self.group_users)
+
+    def members(self, group):
+        return set(self.group_users.get(group, set()))
+
+    def empty_groups(self):
+        return sorted(group for group, members in self.group_users.items() if not members)
+
+    def inactive_users(self):
+        """
+        Inactive users with their groups
+        :return: dict user name -> set of groups
+        """
+        return dict((username, set(groups)) for username, groups in self.user_groups.items()
+                    if not (self.users.get(username) or {}).get('active', True))
+
+    def diff(self, desired, groups=None):
+        """
+        Memberships to add and to remove to go from this snapshot to the desired one
+        :param desired: GroupSnapshot or dict group name -> iterable of user names
+        :param groups: OPTIONAL: groups to compare. Default: the groups of the desired state
+        :return: dict with add and remove sets of (user name, group) pairs
+        """
+        if not isinstance(desired, GroupSnapshot):
+            desired = GroupSnapshot(desired)
+        add = set()
+        remove = set()
+        for group in groups if groups is not None else desired.groups():
+            current = self.members(group)
+            target = desired.members(group)
+            add.update((username, group) for username in target - current)
+            remove.update((username, group) for username in current - target)
+        return {'add': add, 'remove': remove}
+
+    def save(self, path):
+        data = {'groups': dict((group, sorted(members)) for group, members in self.group_users.items()),
+                'users': self.users}
+        with io.open(path, 'w', encoding='utf-8') as stream:
+            stream.write(u'{}'.format(json.dumps(data)))
+
+    @classmethod
+    def load(cls, path):
+        with io.open(path, encoding='utf-8') as stream:
+            data = json.load(stream)
+        return cls(data['groups'], users=data['users'])
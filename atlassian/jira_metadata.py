@@ -0,0 +1,137 @@
+# coding=utf-8
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class JiraMetadata(object):
+    """
+    Registry of the Jira catalogs: fields, statuses, priorities, resolutions, issue types and issue link types.
+    Every catalog is loaded once, indexed by id and by name, and reloaded when it is older than ttl seconds
+    """
+
+    catalogs = ('fields', 'statuses', 'priorities', 'resolutions', 'issue_types', 'link_types')
+
+    def __init__(self, jira, ttl=3600):
+        """
+        :param jira: Jira client
+        :param ttl: OPTIONAL: seconds before a catalog is reloaded, None keeps it forever. Default: 3600
+        """
+        self.jira = jira
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._loaded = {}
+        self._by_id = {}
+        self._by_name = {}
+
+    def _fetch(self, catalog):
+        if catalog == 'fields':
+            return self.jira.get_all_fields()
+        if catalog == 'statuses':
+            return self.jira.get_all_statuses()
+        if catalog == 'priorities':
+            return self.jira.get_all_priorities()
+        if catalog == 'resolutions':
+            return self.jira.get_all_resolutions()
+        if catalog == 'issue_types':
+            return self.jira.get_all_issue_types()
+        if catalog == 'link_types':
+            return self.jira.get_issue_link_types()
+        raise ValueError('Unknown catalog: {}'.format(catalog))
+
+    def _load(self, catalog):
+        with self._lock:
+            loaded = self._loaded.get(catalog)
+            if loaded is not None and (self.ttl is None or time.time() - loaded < self.ttl):
+                return
+            items = self._fetch(catalog) or []
+            self._by_id[catalog] = dict((str(item['id']), item) for item in items)
+            by_name = {}
+            for item in items:
+                # the first item wins for the duplicated names, e.g. custom fields with the same name
+                by_name.setdefault(item['name'].lower(), item)
+            self._by_name[catalog] = by_name
+            self._loaded[catalog] = time.time()
+            log.debug('Loaded {0} {1}'.format(len(items), catalog))
+
+    def refresh(self, catalog=None):
+        """
+        Reload the catalog on the next access
+        :param catalog: OPTIONAL: catalog name. Default: all catalogs
+        """
+        with self._lock:
+            for name in [catalog] if catalog else self.catalogs:
+                self._loaded.pop(name, None)
+
+    def items(self, catalog):
+        """
+        All items of the catalog
+        :param catalog: fields, statuses, priorities, resolutions, issue_types or link_types
+        :return: list
+        """
+        self._load(catalog)
+        return list(self._by_id[catalog].values())
+
+    def get(self, catalog, id_or_name):
+        """
+        Find the catalog item by id or by name, names are case insensitive
+        :param catalog: fields, statuses, priorities, resolutions, issue_types or link_types
+        :param id_or_name:
+        :return: item or None
+        """
+        self._load(catalog)
+        item = self._by_id[catalog].get(str(id_or_name))
+        if item is None:
+            item = self._by_name[catalog].get(str(id_or_name).lower())
+        return item
+
+    def get_id(self, catalog, id_or_name):
+        """
+        Get the id of the catalog item by id or name
+        :return: id or None
+        """
+        item = self.get(catalog, id_or_name)
+        return item['id'] if item is not None else None
+
+    def custom_fields(self):
+        return [field for field in self.items('fields') if field.get('custom')]
+
+    def field_id(self, id_or_name):
+        """
+        Translate the field name into its id, e.g. 'Story Points' into 'customfield_10002'.
+        Unknown names are returned unchanged
+        """
+        return self.get_id('fields', id_or_name) or id_or_name
+
+    def field_ids(self, fields):
+        """
+        Translate the list of field names into the list of field ids, e.g. for the fields of jql()
+        :param fields: list of field names or ids
+        :return: list of field ids
+        """
+        return [self.field_id(field) for field in fields]
+
+    def translate_fields(self, fields):
+        """
+        Translate the field names used as keys into field ids, e.g. for issue_update()
+        :param fields: dict field name or id -> value
+        :return: dict field id -> value
+        """
+        return dict((self.field_id(name), value) for name, value in fields.items())
+
+    def status_id(self, name):
+        return self.get_id('statuses', name)
+
+    def priority_id(self, name):
+        return self.get_id('priorities', name)
+
+    def resolution_id(self, name):
+        return self.get_id('resolutions', name)
+
+    def issue_type_id(self, name):
+        return self.get_id('issue_types', name)
+
+    def link_type_names(self):
+        return [link_type['name'] for link_type in self.items('link_types')]
@@ -0,0 +1,149 @@
+# coding=utf-8
+import json
+import logging
+import sqlite3
+import time
+
+log = logging.getLogger(__name__)
+
+
+class JiraMirror(object):
+    """
+    Local SQLite mirror of the issues matching a jql scope.
+    The first sync loads all issues, the next ones only the issues updated since the previous sync.
+    Deleted issues, or issues moved out of the scope, are removed by the periodic keys reconciliation
+    """
+
+    def __init__(self, jira, path, jql, fields=None, page_size=100, max_workers=1, overlap=5):
+        """
+        :param jira: Jira client
+        :param path: SQLite database file name
+        :param jql: scope of the mirror, without ORDER BY clause
+        :param fields: OPTIONAL: list of fields or fields profile name. Default: the client fields profile
+        :param page_size: OPTIONAL: issues per request. Default: 100
+        :param max_workers: OPTIONAL: number of pages fetched concurrently. Default: 1
+        :param overlap: OPTIONAL: minutes added to the update window, for the clock skew between client and server
+                and the minute precision of jql dates. Default: 5
+        """
+        self.jira = jira
+        self.path = path
+        self.jql = jql
+        self.fields = fields
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.overlap = overlap
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS issues '
+                                '(id TEXT PRIMARY KEY, key TEXT, updated TEXT, data TEXT)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS issues_key ON issues (key)')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)')
+        self.connection.commit()
+
+    def _get_meta(self, name):
+        row = self.connection.execute('SELECT value FROM meta WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name, value):
+        self.connection.execute('INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)', (name, value))
+
+    @property
+    def watermark(self):
+        """
+        Local time of the start of the last successful sync, or None before the first sync
+        """
+        value = self._get_meta('watermark')
+        return float(value) if value is not None else None
+
+    def _store(self, issues):
+        rows = [(issue['id'], issue['key'], (issue.get('fields') or {}).get('updated'), json.dumps(issue))
+                for issue in issues]
+        self.connection.executemany('INSERT OR REPLACE INTO issues (id, key, updated, data) VALUES (?, ?, ?, ?)',
+                                    rows)
+
+    def sync(self, reconcile_every=86400, batch_size=500):
+        """
+        Pull the issues updated since the last sync, or all issues on the first sync.
+        A failed search, or fewer issues than the search total, raises HTTPError before the watermark moves,
+        so the next sync repeats the pull from the previous watermark
+        :param reconcile_every: OPTIONAL: seconds between the keys reconciliations, None disables them.
+                Default: 86400
+        :param batch_size: OPTIONAL: issues per database transaction. Default: 500
+        :return: number of pulled issues
+        """
+        started = time.time()
+        watermark = self.watermark
+        if watermark is None:
+            jql = '({jql}) ORDER BY key'.format(jql=self.jql)
+            log.info('Full load of the Jira mirror {}'.format(self.path))
+        else:
+            minutes = int((started - watermark) / 60) + 1 + self.overlap
+            jql = '({jql}) AND updated >= "-{minutes}m" ORDER BY key'.format(jql=self.jql, minutes=minutes)
+        count = 0
+        batch = []
+        for issue in self.jira.jql_iter(jql, fields=self.fields, page_size=self.page_size,
+                                        max_workers=self.max_workers, strict=True):
+            batch.append(issue)
+            count += 1
+            if len(batch) >= batch_size:
+                self._store(batch)
+                self.connection.commit()
+                batch = []
+        self._store(batch)
+        # the watermark moves only after a complete pull, a failed sync is repeated from the previous one
+        self._set_meta('watermark', str(started))
+        if watermark is None:
+            self._set_meta('reconciled', str(started))
+        self.connection.commit()
+        log.info('Pulled {0} issues into the Jira mirror {1}'.format(count, self.path))
+        last_reconcile = self._get_meta('reconciled')
+        if reconcile_every is not None and (last_reconcile is None or
+                                            started - float(last_reconcile) >= reconcile_every):
+            self.reconcile()
+        return count
+
+    def reconcile(self):
+        """
+        Remove the issues which are deleted or out of the scope, comparing the local ids with the server ones.
+        Nothing is removed unless all ids of the scope are received, a failed search raises HTTPError
+        :return: number of removed issues
+        """
+        started = time.time()
+        jql = '({jql}) ORDER BY key'.format(jql=self.jql)
+        server_ids = set(issue['id'] for issue in self.jira.jql_iter(jql, fields='*none', page_size=1000,
+                                                                      max_workers=self.max_workers, strict=True))
+        local_ids = set(row[0] for row in self.connection.execute('SELECT id FROM issues'))
+        removed = list(local_ids - server_ids)
+        self.connection.executemany('DELETE FROM issues WHERE id = ?', [(issue_id,) for issue_id in removed])
+        self._set_meta('reconciled', str(started))
+        self.connection.commit()
+        log.info('Removed {0} issues from the Jira mirror {1}'.format(len(removed), self.path))
+        return len(removed)
+
+    def issue(self, key):
+        """
+        Get the issue from the mirror
+        :param key: issue key
+        :return: issue or None
+        """
+        row = self.connection.execute('SELECT data FROM issues WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def issues(self, where=None, params=()):
+        """
+        Generator over the mirrored issues
+        :param where: OPTIONAL: SQL condition on the issues table (id, key, updated, data),
+                e.g. "json_extract(data, '$.fields.status.name') = ?"
+        :param params: OPTIONAL: parameters of the condition
+        :return: generator of issues
+        """
+        query = 'SELECT data FROM issues'
+        if where:
+            query += ' WHERE ' + where
+        for row in self.connection.execute(query + ' ORDER BY key', params):
+            yield json.loads(row[0])
+
+    def count(self):
+        return self.connection.execute('SELECT COUNT(*) FROM issues').fetchone()[0]
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,144 @@
+# coding=utf-8
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from requests.exceptions import HTTPError
+
+from .bulk import chunks, concurrent_map, response_error
+
+log = logging.getLogger(__name__)
+
+
+class PermissionCache(object):
+    """
+    Cache of the permissions of the current user, from the mypermissions resource.
+    Issue checks are answered with the permissions of the issue project, except for the issues
+    with a security level, which are asked for the issue.
+    Permissions granted by the issue itself (reporter, assignee, user fields) are verified on demand,
+    permissions restricted by workflow properties of the issue status are not evaluated
+    """
+
+    def __init__(self, jira, ttl=300):
+        """
+        :param jira: Jira8 client
+        :param ttl: OPTIONAL: seconds to keep the permissions of a project or an issue. Default: 300
+        """
+        self.jira = jira
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._permissions = {}
+
+    def _get(self, context, **kwargs):
+        with self._lock:
+            cached = self._permissions.get(context)
+        if cached is not None and time.time() - cached[0] < self.ttl:
+            return cached[1]
+        response = self.jira.get_permissions(**kwargs)
+        error = response_error(response)
+        if error is not None or not isinstance(response, dict):
+            log.error('Failed to get the permissions of {0}: {1}'.format(context[1], error or response))
+            return {}
+        permissions = dict((key, bool(value.get('havePermission')))
+                           for key, value in (response.get('permissions') or {}).items())
+        with self._lock:
+            self._permissions[context] = (time.time(), permissions)
+        return permissions
+
+    def project_permissions(self, project_key):
+        """
+        Permissions of the current user in the project
+        :param project_key:
+        :return: dict permission key -> bool
+        """
+        return self._get(('project', project_key), project_key=project_key)
+
+    def issue_permissions(self, issue_key):
+        """
+        Permissions of the current user on the issue
+        :param issue_key:
+        :return: dict permission key -> bool
+        """
+        return self._get(('issue', issue_key), issue_key=issue_key)
+
+    def has_permission(self, permission, project_key=None, issue_key=None, verify_denied=False):
+        """
+        :param permission: permission key, e.g. EDIT_ISSUES
+        :param project_key: OPTIONAL: project of the check
+        :param issue_key: OPTIONAL: issue of the check, see check_issues() for many issues
+        :param verify_denied: OPTIONAL: see check_issues(). Default: False
+        :return: bool
+        """
+        if issue_key is not None:
+            return self.check_issues([issue_key], permission, verify_denied=verify_denied)[issue_key]
+        return self.project_permissions(project_key).get(permission, False)
+
+    def _search(self, issue_keys):
+        """
+        Project and security level of the issues, page by page. A failed page raises HTTPError
+        """
+        jql = 'key in ({})'.format(', '.join(['"{}"'.format(key) for key in issue_keys]))
+        issues = []
+        while True:
+            data = {'jql': jql,
+                    'startAt': len(issues),
+                    'maxResults': len(issue_keys),
+                    'fields': ['project', 'security'],
+                    'validateQuery': 'warn'}
+            response = self.jira.post('rest/api/2/search', data=data, read_only=True)
+            error = response_error(response) if isinstance(response, dict) else 'Unexpected response: {}'.format(
+                response)
+            if error is None and not isinstance(response.get('issues'), list):
+                error = 'No issues in the response: {}'.format(response)
+            if error is not None:
+                raise HTTPError('Search of the issues permissions failed: {}'.format(error))
+            page = response['issues']
+            issues.extend(page)
+            # the server can cap the page size
+            if not page or len(issues) >= (response.get('total') or 0):
+                return issues
+
+    def check_issues(self, issue_keys, permission, verify_denied=False, chunk_size=200, max_workers=4):
+        """
+        Check the permission on many issues with a few requests: the projects and security levels
+        of the issues are searched by chunks, then every project is asked once.
+        The issues the user can't see, or which don't exist, are denied, a failed search raises HTTPError
+        :param issue_keys: list of issue keys
+        :param permission: permission key, e.g. EDIT_ISSUES
+        :param verify_denied: OPTIONAL: ask the issues for the permissions their project does not grant,
+                for the permissions granted to the reporter, the assignee or a user field. Default: False
+        :param chunk_size: OPTIONAL: keys per search. Default: 200
+        :param max_workers: OPTIONAL: number of concurrent requests. Default: 4
+        :return: ordered dict issue key -> bool
+        """
+        issue_keys = list(OrderedDict.fromkeys(issue_keys))
+        result = OrderedDict((key, False) for key in issue_keys)
+        issues = {}
+        for found in concurrent_map(self._search, chunks(issue_keys, chunk_size), max_workers=max_workers):
+            for issue in found:
+                issues[issue['key']] = issue
+        projects = sorted(set(issue['fields']['project']['key'] for issue in issues.values()))
+        project_permissions = dict(zip(projects, concurrent_map(self.project_permissions, projects,
+                                                                max_workers=max_workers)))
+        issue_level = []
+        for key, issue in issues.items():
+            if key not in result:
+                # a moved issue is found under its new key, the old key stays denied
+                continue
+            fields = issue['fields']
+            granted = project_permissions[fields['project']['key']].get(permission, False)
+            if fields.get('security') or (verify_denied and not granted):
+                issue_level.append(key)
+            else:
+                result[key] = granted
+        for key, permissions in zip(issue_level, concurrent_map(self.issue_permissions, issue_level,
+                                                                max_workers=max_workers)):
+            result[key] = permissions.get(permission, False)
+        log.info('Permission {0}: {1} issues checked, {2} checked individually'.format(
+            permission, len(result), len(issue_level)))
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._permissions.clear()
@@ -0,0 +1,71 @@
+# coding=utf-8
+import io
+import json
+import logging
+import os
+import time
+
+log = logging.getLogger(__name__)
+
+
+class ScreenSchema(object):
+    """
+    In-memory model of the screens, their tabs and the fields of the tabs, indexed by screen and by field
+    """
+
+    def __init__(self, rows=None, created=None):
+        """
+        :param rows: list of dicts with screen_id, tab_id, tab_name, field_id and field_name keys
+        :param created: OPTIONAL: time of the crawl. Default: now
+        """
+        self.created = created or time.time()
+        self._rows = []
+        self.screens = {}
+        self.fields = {}
+        for row in rows or []:
+            self.add(row)
+
+    def add(self, row):
+        self._rows.append(row)
+        tabs = self.screens.setdefault(row['screen_id'], {})
+        tabs.setdefault(row['tab_id'], []).append(row['field_id'])
+        self.fields.setdefault(row['field_id'], []).append((row['screen_id'], row['tab_id']))
+
+    def rows(self):
+        """
+        Rows of the schema, e.g. for the export module
+        :return: list of dicts with screen_id, tab_id, tab_name, field_id and field_name keys
+        """
+        return list(self._rows)
+
+    def screen_fields(self, screen_id):
+        """
+        Field ids of all tabs of the screen
+        """
+        return [field_id for fields in self.screens.get(screen_id, {}).values() for field_id in fields]
+
+    def field_screens(self, field_id):
+        """
+        Screen ids where the field is present
+        """
+        return sorted(set(screen_id for screen_id, __ in self.fields.get(field_id, [])))
+
+    def save(self, path):
+        with io.open(path, 'w', encoding='utf-8') as stream:
+            stream.write(u'{}'.format(json.dumps({'created': self.created, 'rows': self._rows})))
+
+    @classmethod
+    def load(cls, path, max_age=None):
+        """
+        Load the schema saved by save()
+        :param path: file name
+        :param max_age: OPTIONAL: seconds, older schema is not loaded
+        :return: ScreenSchema or None if the file is missing or too old
+        """
+        if not os.path.exists(path):
+            return None
+        with io.open(path, encoding='utf-8') as stream:
+            data = json.load(stream)
+        if max_age is not None and time.time() - data['created'] > max_age:
+            return None
+        return cls(data['rows'], created=data['created'])
@@ -0,0 +1,203 @@
+# coding=utf-8
+import logging
+import threading
+import time
+
+from requests.exceptions import HTTPError
+
+from .bulk import concurrent_map, response_error
+from .utils import is_email
+
+log = logging.getLogger(__name__)
+
+
+class UserDirectory(object):
+    """
+    Cache of the Jira users indexed by username, key and email.
+    Unknown users are cached too, for a shorter time, so they are not looked up again and again
+    """
+
+    def __init__(self, jira, ttl=3600, negative_ttl=300):
+        """
+        :param jira: Jira client
+        :param ttl: OPTIONAL: seconds to keep a user. Default: 3600
+        :param negative_ttl: OPTIONAL: seconds to remember an unknown user. Default: 300
+        """
+        self.jira = jira
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._users = {}
+        self._lists = {}
+
+    @staticmethod
+    def _identifiers(user):
+        for name in ('name', 'key', 'emailAddress'):
+            if user.get(name):
+                yield user[name].lower()
+
+    def add(self, user):
+        """
+        Put the user into the cache under its username, key and email
+        """
+        now = time.time()
+        with self._lock:
+            for identifier in self._identifiers(user):
+                self._users[identifier] = (now, user)
+
+    def _cached(self, identifier):
+        with self._lock:
+            cached = self._users.get(identifier.lower())
+        if cached is None:
+            return False, None
+        created, user = cached
+        ttl = self.ttl if user is not None else self.negative_ttl
+        if time.time() - created >= ttl:
+            return False, None
+        return True, user
+
+    def _lookup(self, params):
+        """
+        :return: user, or None with True when the server answers that the user does not exist
+        """
+        response = self.jira.request('GET', 'rest/api/2/user', params=params)
+        if response.status_code == 404:
+            return None, True
+        error = response_error(response)
+        if error is not None:
+            log.error('Failed to get the user {0}: {1}'.format(params, error))
+            return None, False
+        return response.json(), False
+
+    def _fetch(self, identifier):
+        """
+        :return: user, or None with True when the user surely does not exist
+        """
+        if is_email(identifier) and '@' in identifier:
+            users = self.jira.user_find_by_user_string(identifier, include_inactive_users=True)
+            if not isinstance(users, list):
+                log.error('Failed to search the user {0}: {1}'.format(identifier, users))
+                return None, False
+            users = [user for user in users if isinstance(user, dict)
+                     and (user.get('emailAddress') or '').lower() == identifier.lower()]
+            return (users[0], False) if users else (None, True)
+        user, unknown = self._lookup({'username': identifier})
+        if unknown:
+            # the identifier can be a user key, e.g. JIRAUSER10100
+            user, unknown = self._lookup({'key': identifier})
+        return user, unknown
+
+    def get(self, identifier):
+        """
+        Get the user by username, key or email.
+        Unknown users are remembered for negative_ttl seconds, failed lookups are not cached
+        :param identifier:
+        :return: user or None for unknown user or failed lookup
+        """
+        found, user = self._cached(identifier)
+        if found:
+            return user
+        try:
+            user, unknown = self._fetch(identifier)
+        except Exception as e:
+            log.error('Failed to get the user {0}: {1}: {2}'.format(identifier, e.__class__.__name__, e))
+            return None
+        if user is None:
+            if unknown:
+                with self._lock:
+                    self._users[identifier.lower()] = (time.time(), None)
+        else:
+            self.add(user)
+            # the identifier can be another form, e.g. the old username
+            with self._lock:
+                self._users[identifier.lower()] = (time.time(), user)
+        return user
+
+    def resolve(self, identifiers, max_workers=4):
+        """
+        Resolve many usernames, keys or emails into users, only the identifiers missing in the cache
+        are looked up, concurrently
+        :param identifiers: iterable of identifiers
+        :param max_workers: OPTIONAL: number of concurrent requests. Default: 4
+        :return: dict identifier -> user or None for unknown user
+        """
+        result = {}
+        missing = []
+        seen = set()
+        for identifier in identifiers:
+            if identifier in seen:
+                continue
+            seen.add(identifier)
+            found, user = self._cached(identifier)
+            if found:
+                result[identifier] = user
+            else:
+                missing.append(identifier)
+        for identifier, user in zip(missing, concurrent_map(self.get, missing, max_workers=max_workers)):
+            result[identifier] = user
+        return result
+
+    def warm_up(self, query='.', include_inactive_users=True, page_size=1000):
+        """
+        Load the users matching the search into the cache, page by page. A failed page raises HTTPError
+        :param query: OPTIONAL: user search string, '.' for all users. Default: '.'
+        :param include_inactive_users: OPTIONAL: Default: True
+        :param page_size: OPTIONAL: users per request, the server allows 1000 at most. Default: 1000
+        :return: number of loaded users
+        """
+        users = self._all_pages(lambda start, limit: self.jira.user_find_by_user_string(
+            query, start=start, limit=limit, include_inactive_users=include_inactive_users), page_size=page_size)
+        for user in users:
+            self.add(user)
+        log.info('Loaded {} users into the directory'.format(len(users)))
+        return len(users)
+
+    def _cached_list(self, name, loader):
+        with self._lock:
+            cached = self._lists.get(name)
+        if cached is not None and time.time() - cached[0] < self.ttl:
+            return cached[1]
+        users = loader()
+        for user in users:
+            self.add(user)
+        with self._lock:
+            self._lists[name] = (time.time(), users)
+        return users
+
+    @staticmethod
+    def _all_pages(method, page_size=1000):
+        users = []
+        start = 0
+        while True:
+            page = method(start, page_size)
+            if not isinstance(page, list):
+                error = response_error(page) or 'Unexpected response: {}'.format(page)
+                log.error('Users page at {0} failed: {1}'.format(start, error))
+                raise HTTPError('Users page at {0} failed: {1}'.format(start, error))
+            if not page:
+                break
+            users.extend(page)
+            start += len(page)
+            if len(page) < page_size:
+                break
+        return users
+
+    def assignable_users_for_project(self, project_key):
+        """
+        All assignable users of the project, cached. A failed page raises HTTPError and nothing is cached
+        """
+        return self._cached_list(('project', project_key), lambda: self._all_pages(
+            lambda start, limit: self.jira.get_all_assignable_users_for_project(project_key, start=start,
+                                                                                limit=limit)))
+
+    def assignable_users_for_issue(self, issue_key):
+        """
+        All assignable users of the issue, cached. A failed page raises HTTPError and nothing is cached
+        """
+        return self._cached_list(('issue', issue_key), lambda: self._all_pages(
+            lambda start, limit: self.jira.get_assignable_users_for_issue(issue_key, start=start, limit=limit)))
+
+    def clear(self):
+        with self._lock:
+            self._users = {}
+            self._lists = {}
@@ -1,6 +1,9 @@
 # coding=utf-8
 import json
 import logging
+import re
+import threading
+import time
 from six.moves.urllib.parse import urlencode
 import requests
 from oauthlib.oauth1 import SIGNATURE_RSA
@@ -20,7 +23,8 @@ class AtlassianRestAPI(object):
     response = None
 
     def __init__(self, url, username=None, password=None, timeout=60, api_root='rest/api', api_version='latest',
-                 verify_ssl=True, session=None, oauth=None, cookies=None, advanced_mode=None, kerberos=None):
+                 verify_ssl=True, session=None, oauth=None, cookies=None, advanced_mode=None, kerberos=None,
+                 dry_run=False):
         if ('atlassian.net' in url or 'jira.com' in url) \
                 and '/wiki' not in url \
                 and self.__class__.__name__ in 'Confluence':
@@ -34,6 +38,9 @@ class AtlassianRestAPI(object):
         self.api_version = api_version
         self.cookies = cookies
         self.advanced_mode = advanced_mode
+        self.dry_run = dry_run
+        self.request_stats = {}
+        self._stats_lock = threading.Lock()
         if session is None:
             self._session = requests.Session()
         else:
@@ -110,8 +117,67 @@ class AtlassianRestAPI(object):
             url_link += '/'
         return url_link
 
+    @staticmethod
+    def endpoint_name(path):
+        """
+        Endpoint of the path for the request statistics, path segments with digits are replaced by {id}
+        >>> AtlassianRestAPI.endpoint_name('rest/api/2/issue/DEMO-1/transitions?expand=transitions.fields')
+        'rest/api/2/issue/{id}/transitions'
+        """
+        parts = path.split('?')[0].strip('/').split('/')
+        # rest/<api name>/<api version>/... keeps the version
+        return '/'.join('{id}' if re.search(r'\d', part) and not (index == 2 and parts[0] == 'rest') else part
+                        for index, part in enumerate(parts))
+
+    def _record_request(self, method, path, elapsed=None):
+        key = (method, self.endpoint_name(path))
+        with self._stats_lock:
+            stats = self.request_stats.setdefault(key, {'count': 0, 'sent': 0, 'elapsed': 0.0})
+            stats['count'] += 1
+            if elapsed is not None:
+                stats['sent'] += 1
+                stats['elapsed'] += elapsed
+
+    def request_report(self):
+        """
+        Per endpoint count of the requests made by this client, including the ones held back by dry run mode.
+        The duration of the requests not sent is estimated from the observed latency of the same endpoint,
+        or of all the sent requests when the endpoint was never called
+        :return: dict with endpoints list, total calls and estimated duration in seconds
+        """
+        with self._stats_lock:
+            stats = dict((key, dict(value)) for key, value in self.request_stats.items())
+        sent = sum(value['sent'] for value in stats.values())
+        elapsed = sum(value['elapsed'] for value in stats.values())
+        default_latency = elapsed / sent if sent else 0.0
+        endpoints = []
+        for (method, endpoint), value in sorted(stats.items()):
+            latency = value['elapsed'] / value['sent'] if value['sent'] else default_latency
+            endpoints.append({'method': method,
+                              'endpoint': endpoint,
+                              'count': value['count'],
+                              'sent': value['sent'],
+                              'latency': latency,
+                              'estimated_duration': value['elapsed'] + latency * (value['count'] - value['sent'])})
+        return {'endpoints': endpoints,
+                'total_calls': sum(endpoint['count'] for endpoint in endpoints),
+                'estimated_duration': sum(endpoint['estimated_duration'] for endpoint in endpoints)}
+
+    def reset_request_stats(self):
+        with self._stats_lock:
+            self.request_stats = {}
+
+    def _dry_run_response(self, method, url):
+        log.info('Dry run, {0} {1} is not sent'.format(method, url))
+        response = requests.Response()
+        response.status_code = 204
+        response.url = url
+        response._content = b''
+        response.encoding = 'utf-8'
+        return response
+
     def request(self, method='GET', path='/', data=None, flags=None, params=None, headers=None,
-                files=None, trailing=None):
+                files=None, trailing=None, stream=None, read_only=False):
         """
 
         :param method:
@@ -122,6 +188,9 @@ class AtlassianRestAPI(object):
         :param headers:
         :param files:
         :param trailing: bool
+        :param stream: bool: return the response without reading its body
+        :param read_only: bool: the request changes nothing on the server, e.g. a search sent by POST,
+                so it is sent in dry run mode too
         :return:
         """
         self.log_curl_debug(method=method, path=path, headers=headers, data=data, trailing=None)
@@ -136,6 +205,10 @@ class AtlassianRestAPI(object):
             data = json.dumps(data)
 
         headers = headers or self.default_headers
+        if self.dry_run and method.upper() != 'GET' and not read_only:
+            self._record_request(method.upper(), path)
+            return self._dry_run_response(method, url)
+        started = time.time()
         response = self._session.request(
             method=method,
             url=url,
@@ -143,9 +216,14 @@ class AtlassianRestAPI(object):
             data=data,
             timeout=self.timeout,
             verify=self.verify_ssl,
-            files=files
+            files=files,
+            stream=stream
         )
+        self._record_request(method.upper(), path, time.time() - started)
         response.encoding = 'utf-8'
+        if stream:
+            log.debug('Received: {0}\n Streaming response'.format(response.status_code))
+            return response
         if self.advanced_mode:
             self.response = response
             return response
@@ -212,9 +290,39 @@ class AtlassianRestAPI(object):
                 log.error(e)
                 return answer.text
 
-    def post(self, path, data=None, headers=None, files=None, params=None, trailing=None):
+    def get_stream(self, path, key='values', params=None, headers=None, trailing=None):
+        """
+        Get request which yields the items of a list response while it is still downloading,
+        so huge responses are decoded with flat memory usage.
+        Incremental decoding requires the ijson package, without it the response is decoded at once
+        :param path:
+        :param key: OPTIONAL: key of the list in the response. Default: 'values'
+        :param params:
+        :param headers:
+        :param trailing: OPTIONAL: for wrap slash symbol in the end of string
+        :return: generator of the list items
+        """
+        try:
+            import ijson
+        except ImportError:
+            log.warning('Please, install ijson for incremental decoding, the response is decoded at once')
+            ijson = None
+        response = self.request('GET', path=path, params=params, headers=headers, trailing=trailing, stream=True)
+        try:
+            response.raise_for_status()
+            if ijson is None:
+                for item in (response.json() or {}).get(key) or []:
+                    yield item
+            else:
+                response.raw.decode_content = True
+                for item in ijson.items(response.raw, '{0}.item'.format(key)):
+                    yield item
+        finally:
+            response.close()
+
+    def post(self, path, data=None, headers=None, files=None, params=None, trailing=None, read_only=False):
         response = self.request('POST', path=path, data=data, headers=headers, files=files, params=params,
-                                trailing=trailing)
+                                trailing=trailing, read_only=read_only)
         if self.advanced_mode:
             return response
         try:
@@ -34,7 +34,9 @@ setup(
     ],
     extras_require={
         'kerberos': ['kerberos-sspi ; platform_system=="Windows"',
-                     'kerberos ; platform_system!="Windows"']
+                     'kerberos ; platform_system!="Windows"'],
+        'streaming': ['ijson'],
+        'parquet': ['pyarrow']
     },
     platforms='Platform Independent',
 
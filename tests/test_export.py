@@ -0,0 +1,37 @@
+# coding: utf8
+import io
+import os
+from collections import OrderedDict
+
+import pytest
+
+from atlassian.export import export_csv, export_parquet
+
+
+class TestExportParquet(object):
+
+    def test_sparse_column(self, tmp_path):
+        parquet = pytest.importorskip('pyarrow.parquet')
+        target = str(tmp_path / 'issues.parquet')
+        rows = [{'key': 'DEMO-{}'.format(index), 'points': None if index < 3 else 5.0} for index in range(6)]
+        assert export_parquet(iter(rows), target, batch_size=3) == 6
+        assert parquet.read_table(target).column('points').to_pylist() == [None, None, None, '5.0', '5.0', '5.0']
+
+    def test_failed_export_removes_file(self, tmp_path):
+        pytest.importorskip('pyarrow')
+        target = str(tmp_path / 'issues.parquet')
+        with pytest.raises(Exception):
+            export_parquet(iter([{'points': 1}, {'points': 'many'}]), target, batch_size=1)
+        assert not os.path.exists(target)
+
+
+class TestExportCsv(object):
+
+    def test_unicode_values(self, tmp_path):
+        target = str(tmp_path / 'issues.csv')
+        rows = [OrderedDict([(u'key', u'DEMO-1'),
+                             (u'fields', OrderedDict([(u'summary', u'Caf\xe9'), (u'labels', [u'a'])]))]),
+                {u'key': u'DEMO-2'}]
+        assert export_csv(iter(rows), target) == 2
+        with io.open(target, encoding='utf-8', newline='') as stream:
+            assert stream.read() == u'key,fields.summary,fields.labels\r\nDEMO-1,Caf\xe9,"[""a""]"\r\nDEMO-2,,\r\n'
@@ -0,0 +1,54 @@
+# coding: utf8
+import json
+
+import requests
+
+from atlassian import Jira
+
+
+class AgileSession(object):
+    """
+    Session answering the agile resources from a dict path -> body, with 503 for the other paths
+    """
+
+    def __init__(self, bodies):
+        self.bodies = bodies
+
+    def request(self, method, url, **kwargs):
+        path = url.split('?', 1)[0].split('/rest/agile/1.0/')[-1]
+        response = requests.Response()
+        if path in self.bodies:
+            response.status_code = 200
+            body = self.bodies[path]
+        else:
+            response.status_code = 503
+            body = {'errorMessages': ['Service Unavailable'], 'errors': {}}
+        response._content = json.dumps(body).encode('utf-8')
+        return response
+
+
+def agile_client(bodies):
+    jira = Jira(url='http://localhost:8080', username='admin', password='admin')
+    jira._session = AgileSession(bodies)
+    return jira
+
+
+class TestAgileBoardSnapshots(object):
+
+    def test_snapshot(self):
+        jira = agile_client({'board/1/configuration': {'id': 1, 'type': 'scrum'},
+                             'board/1/sprint': {'isLast': True, 'values': [{'id': 7, 'state': 'active'}]},
+                             'sprint/7/issue': {'startAt': 0, 'total': 1, 'issues': [{'key': 'DEMO-1'}]},
+                             'board/1/backlog': {'startAt': 0, 'total': 1, 'issues': [{'key': 'DEMO-2'}]}})
+        snapshot, = jira.agile_board_snapshots([1])
+        assert snapshot['error'] is None
+        assert snapshot['sprint_issues'] == {7: [{'key': 'DEMO-1'}]}
+        assert snapshot['backlog'] == [{'key': 'DEMO-2'}]
+
+    def test_failed_requests_are_errors(self):
+        jira = agile_client({'board/1/configuration': {'id': 1, 'type': 'scrum'},
+                             'board/1/sprint': {'isLast': True, 'values': []}})
+        failed_configuration, failed_backlog = jira.agile_board_snapshots([2, 1])
+        assert failed_configuration['configuration'] is None
+        assert 'Service Unavailable' in failed_configuration['error']
+        assert 'Service Unavailable' in failed_backlog['error']
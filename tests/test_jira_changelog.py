@@ -0,0 +1,66 @@
+# coding: utf8
+import json
+
+import pytest
+import requests
+from requests.exceptions import HTTPError
+
+from atlassian import Jira
+
+HISTORIES = [{'id': str(index), 'created': '2020-01-01T09:00:00.000+0000', 'author': {'name': 'jdoe'},
+              'items': [{'field': 'status', 'fromString': 'Open', 'toString': 'Done'}]} for index in range(3)]
+
+
+class ChangelogSession(object):
+    """
+    Session answering the changelog resource two histories per page and the issue with the expanded changelog,
+    the answers of the paths in failures are replaced
+    """
+
+    def __init__(self, failures=None):
+        self.failures = failures or {}
+
+    def request(self, method, url, **kwargs):
+        path, __, query = url.partition('?')
+        params = dict(item.split('=', 1) for item in query.split('&'))
+        if (path, params.get('startAt')) in self.failures:
+            status_code, body = self.failures[(path, params.get('startAt'))]
+        elif path.endswith('changelog'):
+            start = int(params['startAt'])
+            status_code, body = 200, {'startAt': start, 'total': len(HISTORIES), 'isLast': start + 2 >= len(HISTORIES),
+                                      'values': HISTORIES[start:start + 2]}
+        else:
+            status_code, body = 200, {'key': 'DEMO-1', 'changelog': {'total': len(HISTORIES), 'histories': HISTORIES}}
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = json.dumps(body).encode('utf-8')
+        return response
+
+
+def changelog_client(failures=None):
+    jira = Jira(url='http://localhost:8080', username='admin', password='admin')
+    jira._session = ChangelogSession(failures)
+    return jira
+
+
+CHANGELOG = 'http://localhost:8080/rest/api/2/issue/DEMO-1/changelog'
+ISSUE = 'http://localhost:8080/rest/api/2/issue/DEMO-1'
+NOT_FOUND = (404, {'errorMessages': ['Not found'], 'errors': {}})
+UNAVAILABLE = (503, {'errorMessages': ['Service Unavailable'], 'errors': {}})
+
+
+class TestChangelogHistories(object):
+
+    def test_pages(self):
+        assert changelog_client().get_issue_changelog_histories('DEMO-1', page_size=2) == HISTORIES
+
+    def test_expanded_changelog_fallback(self):
+        jira = changelog_client({(CHANGELOG, '0'): NOT_FOUND})
+        assert jira.get_issue_changelog_histories('DEMO-1', page_size=2) == HISTORIES
+
+    @pytest.mark.parametrize('failures', [{(CHANGELOG, '0'): UNAVAILABLE},
+                                          {(CHANGELOG, '2'): UNAVAILABLE},
+                                          {(CHANGELOG, '0'): NOT_FOUND, (ISSUE, None): UNAVAILABLE}])
+    def test_failed_page_raises(self, failures):
+        with pytest.raises(HTTPError):
+            changelog_client(failures).get_issue_changelog_histories('DEMO-1', page_size=2)
@@ -0,0 +1,64 @@
+# coding: utf8
+import json
+
+import pytest
+import requests
+from requests.exceptions import HTTPError
+
+from atlassian import Jira
+
+UNAVAILABLE = (503, {'errorMessages': ['Unavailable'], 'errors': {}})
+
+
+class GroupSession(object):
+    """
+    Session answering the group picker and the members of the groups, one member per page
+    """
+
+    def __init__(self, picker, members):
+        self.picker = picker
+        self.members = members
+
+    def request(self, method, url, **kwargs):
+        path, __, query = url.partition('?')
+        params = dict(item.split('=', 1) for item in query.split('&'))
+        if path.endswith('picker'):
+            status_code, body = self.picker
+        elif self.members[params['groupname']] == UNAVAILABLE:
+            status_code, body = UNAVAILABLE
+        else:
+            users = self.members[params['groupname']]
+            start = int(params['startAt'])
+            status_code, body = 200, {'startAt': start, 'total': len(users), 'isLast': start + 1 >= len(users),
+                                      'values': [{'name': name, 'active': True} for name in users[start:start + 1]]}
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = json.dumps(body).encode('utf-8')
+        return response
+
+
+def group_client(picker, members):
+    jira = Jira(url='http://localhost:8080', username='admin', password='admin')
+    jira._session = GroupSession(picker, members)
+    return jira
+
+
+class TestGroupMembershipSnapshot(object):
+
+    def test_all_groups(self):
+        jira = group_client((200, {'total': 2, 'groups': [{'name': 'jira-users'}, {'name': 'empty'}]}),
+                            {'jira-users': ['jane', 'john'], 'empty': []})
+        snapshot = jira.group_membership_snapshot()
+        assert snapshot.empty_groups() == ['empty']
+        assert snapshot.members('jira-users') == {'jane', 'john'}
+
+    def test_failed_group_raises(self):
+        jira = group_client((200, {'total': 1, 'groups': [{'name': 'jira-users'}]}), {'jira-users': UNAVAILABLE})
+        with pytest.raises(HTTPError):
+            jira.group_membership_snapshot(['jira-users'])
+
+    @pytest.mark.parametrize('picker', [UNAVAILABLE, (200, {'total': 25, 'groups': [{'name': 'jira-users'}]})])
+    def test_incomplete_picker_raises(self, picker):
+        jira = group_client(picker, {'jira-users': ['jane']})
+        with pytest.raises(HTTPError):
+            jira.group_membership_snapshot()
@@ -0,0 +1,51 @@
+# coding: utf8
+import pytest
+from requests.exceptions import HTTPError
+
+from atlassian.jira_mirror import JiraMirror
+from .test_jira_search import search_client
+
+SERVICE_UNAVAILABLE = '<html>Service Unavailable</html>'
+
+
+class TestJiraMirror(object):
+
+    def test_failed_sync_keeps_mirror_and_watermark(self, tmp_path):
+        mirror = JiraMirror(search_client(119), str(tmp_path / 'mirror.db'), 'project = DEMO', page_size=50)
+        assert mirror.sync() == 119
+        watermark = mirror.watermark
+        mirror.jira = search_client(119, fail_at=50, failure=SERVICE_UNAVAILABLE)
+        with pytest.raises(HTTPError):
+            mirror.sync()
+        assert mirror.count() == 119
+        assert mirror.watermark == watermark
+
+    def test_failed_reconcile_keeps_mirror(self, tmp_path):
+        mirror = JiraMirror(search_client(119), str(tmp_path / 'mirror.db'), 'project = DEMO', page_size=50)
+        mirror.sync()
+        for failure in (SERVICE_UNAVAILABLE, {'errorMessages': ['Internal server error'], 'errors': {}}):
+            mirror.jira = search_client(119, fail_at=0, failure=failure)
+            with pytest.raises(HTTPError):
+                mirror.reconcile()
+            assert mirror.count() == 119
+
+    def test_short_search_keeps_mirror_and_watermark(self, tmp_path):
+        mirror = JiraMirror(search_client(119), str(tmp_path / 'mirror.db'), 'project = DEMO', page_size=50)
+        mirror.sync()
+        watermark = mirror.watermark
+        # the pages after the first one come back empty, without any error
+        mirror.jira = search_client(119, fail_at=50, failure={'startAt': 50, 'total': 119, 'issues': []})
+        with pytest.raises(HTTPError):
+            mirror.sync()
+        assert mirror.watermark == watermark
+        mirror.jira = search_client(119, fail_at=0, failure={'startAt': 0, 'total': 119, 'issues': []})
+        with pytest.raises(HTTPError):
+            mirror.reconcile()
+        assert mirror.count() == 119
+
+    def test_reconcile_removes_deleted_issues(self, tmp_path):
+        mirror = JiraMirror(search_client(119), str(tmp_path / 'mirror.db'), 'project = DEMO', page_size=50)
+        mirror.sync()
+        mirror.jira = search_client(100)
+        assert mirror.reconcile() == 19
+        assert mirror.count() == 100
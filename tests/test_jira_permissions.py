@@ -0,0 +1,58 @@
+# coding: utf8
+import json
+
+import requests
+
+from atlassian import Jira8
+
+
+class PermissionSession(object):
+    """
+    Session answering mypermissions by project or issue and the searches two issues per page
+    """
+
+    def __init__(self, projects, issues):
+        self.projects = projects
+        self.issues = issues
+        self.requests = []
+
+    def request(self, method, url, data=None, **kwargs):
+        path, __, query = url.partition('?')
+        self.requests.append((method, path.split('/rest/')[-1], query))
+        if path.endswith('mypermissions'):
+            name, __, value = query.partition('=')
+            granted = self.projects.get(value) if name == 'projectKey' else value == 'DEMO-3'
+            body = {'permissions': {'EDIT_ISSUES': {'key': 'EDIT_ISSUES', 'havePermission': granted}}}
+        else:
+            search = json.loads(data)
+            keys = [key.strip(' "') for key in search['jql'][len('key in ('):-1].split(',')]
+            found = [issue for issue in self.issues if issue['key'] in keys]
+            body = {'startAt': search['startAt'], 'total': len(found),
+                    'issues': found[search['startAt']:search['startAt'] + 2]}
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(body).encode('utf-8')
+        return response
+
+
+def issue(key, security=None):
+    return {'key': key, 'fields': {'project': {'key': key.split('-')[0]}, 'security': security}}
+
+
+class TestPermissionCache(object):
+
+    def test_check_issues(self):
+        jira8 = Jira8(url='http://localhost:8080', username='admin', password='admin', dry_run=True)
+        jira8._session = PermissionSession({'DEMO': True, 'OPS': False},
+                                           [issue('DEMO-1'), issue('DEMO-2'), issue('DEMO-3', {'id': '1'}),
+                                            issue('OPS-1'), issue('OPS-2')])
+        keys = ['DEMO-1', 'DEMO-2', 'DEMO-3', 'OPS-1', 'OPS-2', 'GONE-1']
+        result = jira8.permission_cache.check_issues(keys, 'EDIT_ISSUES')
+        assert result == {'DEMO-1': True, 'DEMO-2': True, 'DEMO-3': True, 'OPS-1': False, 'OPS-2': False,
+                          'GONE-1': False}
+        searches = [request for request in jira8._session.requests if request[1] == 'api/2/search']
+        assert len(searches) == 3
+        jira8.permission_cache.check_issues(keys, 'EDIT_ISSUES')
+        permissions = [request for request in jira8._session.requests if request[1] == 'api/2/mypermissions']
+        assert sorted(query for __, __, query in permissions) == ['issueKey=DEMO-3', 'projectKey=DEMO',
+                                                                  'projectKey=OPS']
@@ -0,0 +1,40 @@
+# coding: utf8
+import json
+
+import requests
+
+from atlassian import Jira
+
+
+class ProjectSession(object):
+    """
+    Session answering the projects list without leads, the details of OPS fail
+    """
+
+    def request(self, method, url, **kwargs):
+        path = url.split('?', 1)[0].split('/rest/api/2/')[-1]
+        status_code = 200
+        if path == 'project':
+            body = [{'key': 'DEMO', 'name': 'Demo'}, {'key': 'OPS', 'name': 'Ops'}]
+        elif path == 'project/DEMO':
+            body = {'key': 'DEMO', 'name': 'Demo', 'lead': {'name': 'jdoe', 'displayName': 'John Doe'}}
+        elif path == 'project/OPS':
+            status_code, body = 503, {'errorMessages': ['Service Unavailable'], 'errors': {}}
+        else:
+            body = {'name': 'jdoe', 'displayName': 'John Doe', 'emailAddress': 'jdoe@example.com'}
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = json.dumps(body).encode('utf-8')
+        return response
+
+
+class TestProjectInventory(object):
+
+    def test_failed_project_keeps_listing(self):
+        jira = Jira(url='http://localhost:8080', username='admin', password='admin')
+        jira._session = ProjectSession()
+        rows = list(jira.project_inventory())
+        assert [row['project_key'] for row in rows] == ['DEMO', 'OPS']
+        assert rows[0]['lead_email'] == 'jdoe@example.com'
+        assert rows[1]['project_name'] == 'Ops'
+        assert rows[1]['lead_name'] is None
@@ -0,0 +1,155 @@
+# coding: utf8
+import io
+import json
+import os
+
+import pytest
+import requests
+from requests.exceptions import HTTPError
+from six.moves.urllib.parse import parse_qsl
+
+from atlassian import Jira
+
+
+def search_client(total, fail_at=None, failure=None):
+    """
+    Jira client answering the searches from a list of total issues, the page at fail_at fails
+    """
+    jira = Jira(url='http://localhost:8080', username='admin', password='admin')
+
+    def jql(query, fields=None, start=0, limit=None, expand=None):
+        if start == fail_at:
+            return failure
+        issues = [{'id': str(index), 'key': 'DEMO-{}'.format(index)}
+                  for index in range(start, min(start + limit, total))]
+        return {'startAt': start, 'maxResults': limit, 'total': total, 'issues': issues}
+
+    jira.jql = jql
+    return jira
+
+
+class TestJqlIter(object):
+
+    @pytest.mark.parametrize('max_workers', [1, 4])
+    def test_all_pages(self, max_workers):
+        jira = search_client(299)
+        assert len(list(jira.jql_iter('project = DEMO', max_workers=max_workers))) == 299
+
+    @pytest.mark.parametrize('max_workers', [1, 4])
+    @pytest.mark.parametrize('failure', [{'errorMessages': ['Internal server error'], 'errors': {}},
+                                         '<html>Service Unavailable</html>',
+                                         None])
+    def test_failed_page_raises(self, max_workers, failure):
+        jira = search_client(299, fail_at=100, failure=failure)
+        with pytest.raises(HTTPError):
+            list(jira.jql_iter('project = DEMO', max_workers=max_workers))
+
+    def test_failed_page_is_not_truncation(self):
+        jira = search_client(299, fail_at=200, failure={'errorMessages': ['Internal server error'], 'errors': {}})
+        with pytest.raises(HTTPError):
+            jira.get_all_project_issues('DEMO')
+
+    def test_boundary_duplicates(self):
+        jira = search_client(299)
+        jql = jira.jql
+
+        def shifted(query, start=0, **kwargs):
+            # an issue created before the page moves the last issue of the previous page into it
+            result = jql(query, start=max(start - 1, 0), **kwargs)
+            return dict(result, startAt=start)
+
+        jira.jql = shifted
+        keys = [issue['key'] for issue in jira.jql_iter('project = DEMO')]
+        assert len(keys) == len(set(keys)) == 299
+
+    def test_strict_total(self):
+        jira = search_client(299)
+        jql = jira.jql
+        # the result shrinks after the first page
+        jira.jql = lambda query, start=0, **kwargs: dict(jql(query, start=start, **kwargs),
+                                                         issues=[] if start >= 200 else
+                                                         jql(query, start=start, **kwargs)['issues'])
+        assert len(list(jira.jql_iter('project = DEMO'))) == 200
+        with pytest.raises(HTTPError):
+            list(jira.jql_iter('project = DEMO', strict=True))
+
+
+class FakeSession(object):
+    """
+    Session answering every request with the same JSON body
+    """
+
+    def __init__(self, body):
+        self.body = body
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url))
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(self.body).encode('utf-8')
+        return response
+
+
+class TestDryRun(object):
+
+    def test_searches_are_sent(self):
+        jira = Jira(url='http://localhost:8080', username='admin', password='admin', dry_run=True)
+        jira._session = FakeSession({'startAt': 0, 'total': 1, 'issues': [{'id': '1', 'key': 'DEMO-1',
+                                                                           'fields': {'labels': []}}]})
+        issues, missing = jira.bulk_issue_map(['DEMO-1', 'DEMO-2'])
+        assert list(issues) == ['DEMO-1']
+        assert missing == ['DEMO-2']
+        report = jira.bulk_update_issues({'DEMO-1': {'labels': ['triaged']}})
+        assert report['changed'] == ['DEMO-1']
+        assert [method for method, url in jira._session.requests] == ['POST', 'POST']
+        stats = jira.request_stats
+        assert stats[('POST', 'rest/api/2/search')]['sent'] == 2
+        assert stats[('PUT', 'rest/api/2/issue/{id}')]['sent'] == 0
+
+
+class CsvSession(object):
+    """
+    Session answering the CSV chunks from a dict start -> (status code, text)
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def request(self, method, url, **kwargs):
+        query = dict(parse_qsl(url.split('?', 1)[-1]))
+        status_code, text = self.chunks[int(query.get('pager/start', 0))]
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = text.encode('utf-8')
+        return response
+
+
+def csv_client(chunks, total=3):
+    jira = Jira(url='http://localhost:8080', username='admin', password='admin')
+    jira.jql_count = lambda jql: total
+    jira._session = CsvSession(chunks)
+    return jira
+
+
+class TestCsvExport(object):
+
+    def test_chunks_are_merged(self, tmp_path):
+        jira = csv_client({0: (200, u'\ufeffIssue key,Label,Label,Summary\nDEMO-1,a,b,Caf\xe9\nDEMO-2,,,Tea\n'),
+                           2: (200, u'\ufeffIssue key,Summary,Label\nDEMO-3,"Multi\nline",c\n')})
+        target = str(tmp_path / 'issues.csv')
+        assert jira.csv_export('project = DEMO', target, chunk_size=2, max_workers=2) == 3
+        with io.open(target, encoding='utf-8', newline='') as stream:
+            assert stream.read() == (u'Issue key,Label,Label,Summary\r\n'
+                                     u'DEMO-1,a,b,Caf\xe9\r\n'
+                                     u'DEMO-2,,,Tea\r\n'
+                                     u'DEMO-3,c,,"Multi\nline"\r\n')
+
+    @pytest.mark.parametrize('last_chunk', [(503, u'<html><body>Service Unavailable</body></html>'),
+                                            (200, u'Issue key,Summary\n')])
+    def test_failed_chunk_raises(self, tmp_path, last_chunk):
+        jira = csv_client({0: (200, u'Issue key,Summary\nDEMO-1,Tea\nDEMO-2,Tea\n'), 2: last_chunk})
+        target = str(tmp_path / 'issues.csv')
+        with pytest.raises(HTTPError):
+            jira.csv_export('project = DEMO', target, chunk_size=2)
+        assert not os.path.exists(target)
@@ -0,0 +1,53 @@
+# coding: utf8
+import json
+
+import requests
+
+from atlassian import Jira
+
+
+def issue(key, status_id):
+    return {'id': key.split('-')[1], 'key': key,
+            'fields': {'project': {'key': 'DEMO'}, 'issuetype': {'id': '1'},
+                       'status': {'id': status_id, 'name': 'Status {}'.format(status_id)}}}
+
+
+class TransitionSession(object):
+    """
+    Session answering the issues search, the transitions of the issues and the transition posts,
+    the transitions of the issues in the failing status fail
+    """
+
+    def __init__(self, issues, failing_status):
+        self.issues = issues
+        self.failing_status = failing_status
+
+    def request(self, method, url, **kwargs):
+        path = url.split('?', 1)[0]
+        status_code, body = 204, None
+        if path.endswith('search'):
+            status_code, body = 200, {'startAt': 0, 'total': len(self.issues), 'issues': self.issues}
+        elif method == 'GET':
+            key = path.split('/')[-2]
+            if [found for found in self.issues if found['key'] == key][0]['fields']['status']['id'] == \
+                    self.failing_status:
+                status_code, body = 503, {'errorMessages': ['Service Unavailable'], 'errors': {}}
+            else:
+                status_code, body = 200, {'transitions': [{'id': '31', 'name': 'Done', 'to': {'name': 'Done'}}]}
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = json.dumps(body).encode('utf-8') if body is not None else b''
+        return response
+
+
+class TestBulkSetIssueStatus(object):
+
+    def test_failed_group_is_reported(self):
+        jira = Jira(url='http://localhost:8080', username='admin', password='admin')
+        jira._session = TransitionSession([issue('DEMO-1', '1'), issue('DEMO-2', '2'), issue('DEMO-3', '2')], '2')
+        report = jira.bulk_set_issue_status(['DEMO-1', 'DEMO-2', 'DEMO-3'], 'Done')
+        assert report['transitioned'] == ['DEMO-1']
+        assert sorted(report['failed']) == ['DEMO-2', 'DEMO-3']
+        assert 'Service Unavailable' in report['failed']['DEMO-2']
+        jira._session.failing_status = None
+        assert jira.bulk_set_issue_status(['DEMO-2'], 'Done')['transitioned'] == ['DEMO-2']
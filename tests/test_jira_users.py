@@ -0,0 +1,70 @@
+# coding: utf8
+import json
+
+import pytest
+import requests
+from requests.exceptions import HTTPError
+
+from atlassian import Jira
+
+
+class UserSession(object):
+    """
+    Session answering the user lookups from a dict query string -> (status code, body)
+    """
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.queries = []
+
+    def request(self, method, url, **kwargs):
+        query = url.split('?', 1)[-1]
+        self.queries.append(query)
+        status_code, body = self.answers.get(query, (404, {'errorMessages': ['Not found'], 'errors': {}}))
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = json.dumps(body).encode('utf-8')
+        return response
+
+
+def user_directory(answers):
+    jira = Jira(url='http://localhost:8080', username='admin', password='admin')
+    jira._session = UserSession(answers)
+    return jira.user_directory
+
+
+class TestUserDirectory(object):
+
+    def test_key_lookup(self):
+        directory = user_directory({'key=JIRAUSER10100': (200, {'name': 'jdoe', 'key': 'JIRAUSER10100'})})
+        assert directory.get('JIRAUSER10100')['name'] == 'jdoe'
+        assert directory.get('jdoe')['key'] == 'JIRAUSER10100'
+
+    def test_unknown_user_is_cached(self):
+        directory = user_directory({})
+        assert directory.get('ghost') is None
+        assert directory.get('ghost') is None
+        assert directory.jira._session.queries == ['username=ghost', 'key=ghost']
+
+    def test_failed_lookup_is_not_cached(self):
+        directory = user_directory({'username=jdoe': (503, {'errorMessages': ['Unavailable'], 'errors': {}})})
+        assert directory.get('jdoe') is None
+        directory.jira._session.answers['username=jdoe'] = (200, {'name': 'jdoe', 'key': 'jdoe'})
+        assert directory.get('jdoe')['name'] == 'jdoe'
+
+    def test_resolve_duplicates(self):
+        directory = user_directory({'username=jdoe': (200, {'name': 'jdoe', 'key': 'jdoe'})})
+        result = directory.resolve(['jdoe', 'jdoe', 'ghost', 'ghost'])
+        assert result['jdoe']['name'] == 'jdoe'
+        assert result['ghost'] is None
+        assert directory.jira._session.queries.count('username=jdoe') == 1
+
+    def test_failed_assignable_page_is_not_cached(self):
+        first_page = [{'name': 'user{}'.format(index), 'key': 'user{}'.format(index)} for index in range(1000)]
+        directory = user_directory({'project=DEMO&startAt=0&maxResults=1000': (200, first_page),
+                                    'project=DEMO&startAt=1000&maxResults=1000': (503, {'errorMessages': ['Unavailable'],
+                                                                                        'errors': {}})})
+        with pytest.raises(HTTPError):
+            directory.assignable_users_for_project('DEMO')
+        directory.jira._session.answers['project=DEMO&startAt=1000&maxResults=1000'] = (200, [])
+        assert len(directory.assignable_users_for_project('DEMO')) == 1000
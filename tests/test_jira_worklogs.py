@@ -0,0 +1,50 @@
+# coding: utf8
+import json
+
+import requests
+
+from atlassian import Jira
+
+
+class WorklogSession(object):
+    """
+    Session answering the worklogs of the issues from a dict issue key -> (status code, body)
+    """
+
+    def __init__(self, worklogs):
+        self.worklogs = worklogs
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        path = url.split('?', 1)[0]
+        self.requests.append((method, path))
+        if method == 'GET':
+            status_code, body = self.worklogs[path.split('/')[-2]]
+        else:
+            status_code, body = 201, {'id': '10001'}
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = json.dumps(body).encode('utf-8')
+        return response
+
+
+class TestBulkAddWorklogs(object):
+
+    def test_duplicates_are_skipped(self):
+        jira = Jira(url='http://localhost:8080', username='admin', password='admin')
+        jira._session = WorklogSession({'DEMO-1': (200, {'startAt': 0, 'total': 1, 'worklogs': [
+            {'id': '10000', 'started': '2020-01-01T10:00:00.000+0100', 'timeSpentSeconds': 3600}]})})
+        report = jira.bulk_add_worklogs([
+            {'issue': 'DEMO-1', 'started': '2020-01-01T09:00:00.000+0000', 'timeSpentSeconds': 3600},
+            {'issue': 'DEMO-1', 'started': '2020-01-02T09:00:00.000+0000', 'timeSpentSeconds': 3600}])
+        assert report['duplicates'] == [{'index': 0, 'issue': 'DEMO-1', 'id': '10000'}]
+        assert report['created'] == [{'index': 1, 'issue': 'DEMO-1', 'id': '10001'}]
+
+    def test_failed_worklogs_fetch_writes_nothing(self):
+        jira = Jira(url='http://localhost:8080', username='admin', password='admin')
+        jira._session = WorklogSession({'DEMO-1': (503, {'errorMessages': ['Unavailable'], 'errors': {}})})
+        report = jira.bulk_add_worklogs([
+            {'issue': 'DEMO-1', 'started': '2020-01-01T09:00:00.000+0000', 'timeSpentSeconds': 3600}])
+        assert report['created'] == []
+        assert [result['index'] for result in report['failed']] == [0]
+        assert [method for method, __ in jira._session.requests] == ['GET']